@@ -0,0 +1,41 @@
+import sys
+import time
+
+import polars as pl
+
+from cvrp_solver_comparison.domain.cache import load_instance
+from cvrp_solver_comparison.solver.ortools import (
+    build_routing_model,
+    search_parameters,
+)
+
+# compares OR-Tools' search throughput with arc costs and demands registered
+# as Python callbacks vs. as native matrix/vector at the same time limit
+instance_paths = sys.argv[1:] or ["data/X/X-n101-k25.vrp"]
+time_limit = 3
+
+if __name__ == "__main__":
+    rows = []
+    for path in instance_paths:
+        instance = load_instance(path)
+        for transit in ["callback", "matrix"]:
+            _, routing = build_routing_model(instance, transit=transit)
+            tic = time.perf_counter()
+            solution = routing.SolveWithParameters(search_parameters(time_limit))
+            toc = time.perf_counter()
+            solver = routing.solver()
+            rows.append(
+                {
+                    "Instance": instance.name,
+                    "Transit": transit,
+                    "Cost": solution.ObjectiveValue() if solution else None,
+                    "Accepted Neighbors/s": solver.AcceptedNeighbors() / (toc - tic),
+                    "Branches/s": solver.Branches() / (toc - tic),
+                }
+            )
+    df = pl.DataFrame(rows)
+    speedup = df.pivot(
+        on="Transit", index="Instance", values="Accepted Neighbors/s"
+    ).with_columns((pl.col("matrix") / pl.col("callback")).alias("Speedup"))
+    print(df)
+    print(speedup)
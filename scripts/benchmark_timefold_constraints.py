@@ -0,0 +1,135 @@
+import logging
+import re
+import sys
+
+import polars as pl
+from timefold.solver import SolverFactory
+from timefold.solver.config import (
+    Duration,
+    ScoreDirectorFactoryConfig,
+    SolverConfig,
+    TerminationConfig,
+)
+from timefold.solver.score import (
+    ConstraintFactory,
+    HardSoftScore,
+    constraint_provider,
+)
+
+from cvrp_solver_comparison.domain.cache import load_instance
+from cvrp_solver_comparison.domain.fleet import fleet_size
+from cvrp_solver_comparison.solver.timefold_solver.constraints import (
+    define_constraints,
+    vehicle_capacity,
+)
+from cvrp_solver_comparison.solver.timefold_solver.domain import (
+    DistanceMatrix,
+    Vehicle,
+    VehicleRoutePlan,
+    Visit,
+)
+from cvrp_solver_comparison.solver.timefold_solver.timefold_solver import (
+    build_problem,
+)
+
+# compares the moves Timefold evaluates per second with the travel time
+# computed from arc_distance shadow variables (the constraints in
+# timefold_solver/constraints.py) vs. by joining the DistanceMatrix fact
+instance_paths = sys.argv[1:] or ["data/X/X-n101-k25.vrp"]
+time_limit = 30
+
+
+@constraint_provider
+def define_constraints_with_join(factory: ConstraintFactory):
+    return [
+        vehicle_capacity(factory),
+        factory.for_each(Visit)
+        .filter(
+            lambda visit: visit.vehicle is not None and visit.previous_visit is None
+        )
+        .join(DistanceMatrix)
+        .penalize(
+            HardSoftScore.ONE_SOFT,
+            lambda visit, dm: dm.matrix[visit.vehicle.home_location][visit.location],
+        )
+        .as_constraint("depotToFirstVisit"),
+        factory.for_each(Visit)
+        .filter(lambda visit: visit.previous_visit is not None)
+        .join(DistanceMatrix)
+        .penalize(
+            HardSoftScore.ONE_SOFT,
+            lambda visit, dm: dm.matrix[visit.previous_visit.location][visit.location],
+        )
+        .as_constraint("visitToVisit"),
+        factory.for_each(Visit)
+        .filter(lambda visit: visit.vehicle is not None and visit.next_visit is None)
+        .join(DistanceMatrix)
+        .penalize(
+            HardSoftScore.ONE_SOFT,
+            lambda visit, dm: dm.matrix[visit.location][visit.vehicle.home_location],
+        )
+        .as_constraint("lastVisitToDepot"),
+    ]
+
+
+class SpeedHandler(logging.Handler):
+    """Picks the evaluation speed from Timefold's 'Solving ended' log line."""
+
+    pattern = re.compile(r"(?:move evaluation|score calculation) speed \((\d+)/sec\)")
+
+    def __init__(self):
+        super().__init__()
+        self.speed = None
+
+    def emit(self, record):
+        match = self.pattern.search(record.getMessage())
+        if "Solving ended" in record.getMessage() and match:
+            self.speed = int(match.group(1))
+
+
+if __name__ == "__main__":
+    handler = SpeedHandler()
+    logger = logging.getLogger("timefold.solver")
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+    providers = {
+        "join": define_constraints_with_join,
+        "shadow": define_constraints,
+    }
+    rows = []
+    for path in instance_paths:
+        instance = load_instance(path)
+        for name, provider in providers.items():
+            solver = SolverFactory.create(
+                SolverConfig(
+                    solution_class=VehicleRoutePlan,
+                    entity_class_list=[Vehicle, Visit],
+                    score_director_factory_config=ScoreDirectorFactoryConfig(
+                        constraint_provider_function=provider
+                    ),
+                    termination_config=TerminationConfig(
+                        spent_limit=Duration(seconds=time_limit)
+                    ),
+                )
+            ).build_solver()
+            problem = build_problem(
+                instance, fleet_size(instance), with_distance_matrix=True
+            )
+            handler.speed = None
+            solution = solver.solve(problem)
+            rows.append(
+                {
+                    "Instance": instance.name,
+                    "Constraints": name,
+                    "Cost": -solution.score.soft_score,
+                    "Moves/s": handler.speed,
+                }
+            )
+    df = pl.DataFrame(rows)
+    print(df)
+    print(
+        df.pivot(on="Constraints", index="Instance", values="Moves/s").with_columns(
+            (pl.col("shadow") / pl.col("join")).alias("Speedup")
+        )
+    )
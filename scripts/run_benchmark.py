@@ -1,16 +1,25 @@
-import time
-import vrplib
-from pathlib import Path
-from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.source import find_instances, iter_instances
 import polars as pl
 
-from cvrp_solver_comparison.solver.solver import create_solver
-from cvrp_solver_comparison.domain.utils import validate
-from datetime import datetime
-
-instance_names = list(
-    set(f.name.split(".")[0] for f in Path("data/X").iterdir() if f.is_file())
+from cvrp_solver_comparison.solver.sandbox import run_sandboxed
+from cvrp_solver_comparison.benchmark.archive import SolutionArchive
+from cvrp_solver_comparison.benchmark.runner import (
+    Cell,
+    result_row,
+    run_parallel,
+    wall_clock_limit,
 )
+from cvrp_solver_comparison.benchmark.stats import aggregate
+from cvrp_solver_comparison.benchmark.store import ResultStore, code_version
+from cvrp_solver_comparison.benchmark.traces import qualities_at
+from cvrp_solver_comparison.solver.options import SolverOptions
+
+# instances of the sweep, see domain.source.find_instances
+instance_dir = "data/X"
+instance_pattern = "*.vrp"
+min_size = None
+max_size = None
+shard = None  # (index, count), to split the sweep across machines
 
 solver_names = [
     # "vroom",
@@ -22,58 +31,132 @@ solver_names = [
 ]  # ,'pyvrp' 'ortools', 'vroom', 'timefold', 'rustvrp', 'pyhygese'
 time_limits = [1, 10, 60]
 num_instances = 5
+prefetch = 2  # instances parsed in the background while the current one is solved
 
-results = {
-    "Instance": [],
-    "Size": [],
-    "Time Limit (s)": [],
-    "Actual Time (s)": [],
-    "Solver": [],
-    "Solution Quality": [],
-}
-instance_names.sort()
-for name in instance_names[:num_instances]:
-    instance = vrplib.read_instance(f"data/X/{name}.vrp")
-    solution = vrplib.read_solution(f"data/X/{name}.sol")
-    instance = Instance.model_validate(instance)
-    best_solution = Solution.model_validate(solution)
-    for time_limit in time_limits:
-        if time_limit is None:
-            assert solver_names[0] == "vroom"
-            time_limit = 1
-        solvers = {
-            name: create_solver(method=name, time_limit=time_limit)
-            for name in solver_names
-        }
-        for s_name, solver in solvers.items():
-            tic = time.time()
-            solution = solver(instance, time_limit)
-            toc = time.time()
-            real_time = toc - tic
-            if real_time > time_limit * 1.1:
-                print(
-                    f"Warning, solver {s_name} took {real_time:2f} s on instance {name} despite setting a time limit of {time_limit} s."
-                )
+# only run the largest time limit and read the quality at the others off the
+# convergence traces of these runs, instead of running every time limit
+derive_time_limits = False
+
+# every cell is run with each of these seeds and thread counts, the rest of the options is shared
+seeds = [0]  # e.g. range(10) for confidence intervals over the stochastic solvers
+thread_counts = [1]
+solver_options = SolverOptions()
+
+# parallel mode: every (instance, solver, time limit, seed, threads) runs in its own worker process
+parallel = False
+max_workers = None  # None: one worker per group of cpus_per_worker cores
+cpus_per_worker = 1
+
+# every solve runs in a child process that is killed when it exceeds these limits
+memory_limit_mb = None  # resident memory, polled
+address_space_limit_mb = None  # virtual memory (RLIMIT_AS), see run_sandboxed
+wall_clock_factor = 1.5  # see benchmark.runner.wall_clock_limit
+
+# profile every solve, None, "cprofile" or "py-spy", profiles are written to data/profiles
+profiler = None
+
+# results are appended to this store, a restarted sweep skips the cells it already contains
+results_path = "data/results.sqlite"
+# the solutions of all runs are archived here, e.g. to re-validate them or warm-start from the best known one
+archive_path = "data/solutions"
 
-            results["Instance"].append(instance.name)
-            results["Size"].append(len(instance.demand))
-            results["Time Limit (s)"].append(time_limit)
-            results["Actual Time (s)"].append(float(real_time))
-            results["Solver"].append(s_name)
-            try:
-                validate(solution=solution, instance=instance)
-                results["Solution Quality"].append(
-                    float(solution.cost / best_solution.cost)
+if __name__ == "__main__":
+    instance_paths = find_instances(
+        instance_dir,
+        pattern=instance_pattern,
+        min_size=min_size,
+        max_size=max_size,
+        shard=shard,
+    )[:num_instances]
+    run_time_limits = [max(time_limits)] if derive_time_limits else time_limits
+    store = ResultStore(results_path)
+    version = code_version()
+    # every solution is written as soon as its row is in the store, so that a
+    # killed sweep, which skips the stored cells when restarted, loses none
+    with SolutionArchive(archive_path, flush_every=1) as archive:
+        if parallel:
+            cells = [
+                Cell(
+                    instance=path.stem,
+                    solver=s_name,
+                    time_limit=time_limit,
+                    seed=seed,
+                    threads=threads,
                 )
-            except Exception as e:  # noqa: E722
-                results["Solution Quality"].append(-1.0)
-            if s_name == "vroom":
-                time_limit = max(
-                    1, round(real_time)
-                )  # everybody is taking the time that vroom needed
+                for path in instance_paths
+                for time_limit in run_time_limits
+                for s_name in solver_names
+                for seed in seeds
+                for threads in thread_counts
+            ]
+            run_parallel(
+                cells,
+                instance_dir,
+                max_workers=max_workers,
+                cpus_per_worker=cpus_per_worker,
+                options=solver_options,
+                profiler=profiler,
+                memory_limit_mb=memory_limit_mb,
+                address_space_limit_mb=address_space_limit_mb,
+                wall_clock_factor=wall_clock_factor,
+                store=store,
+                archive=archive,
+                code_version=version,
+            )
+        else:
+            done = store.done(version)
+            instances = iter_instances(instance_paths, prefetch=prefetch)
+            for path, (instance, best_solution) in zip(instance_paths, instances):
+                name = path.stem
+                for time_limit in run_time_limits:
+                    for s_name in solver_names:
+                        for seed in seeds:
+                            for threads in thread_counts:
+                                cell = Cell(
+                                    instance=name,
+                                    solver=s_name,
+                                    time_limit=time_limit,
+                                    seed=seed,
+                                    threads=threads,
+                                )
+                                if cell.key in done:
+                                    continue
+                                result = run_sandboxed(
+                                    s_name,
+                                    path,
+                                    time_limit,
+                                    options=cell.options(solver_options),
+                                    profiler=profiler,
+                                    wall_clock_limit=wall_clock_limit(
+                                        s_name, time_limit, wall_clock_factor
+                                    ),
+                                    memory_limit_mb=memory_limit_mb,
+                                    address_space_limit_mb=address_space_limit_mb,
+                                )
+                                row = result_row(cell, instance, best_solution, result)
+                                store.append(
+                                    row,
+                                    seed=cell.seed,
+                                    threads=cell.threads,
+                                    code_version=version,
+                                )
+                                archive.append_row(
+                                    row,
+                                    seed=cell.seed,
+                                    threads=cell.threads,
+                                    code_version=version,
+                                )
+                                done.add(cell.key)
 
-    # just to be save, save after every instance:
-    df = pl.DataFrame(results)
-    df.write_csv(f"data/benchmark_no_vroom{datetime.now()}.csv")
-df = pl.DataFrame(results)
-df.write_csv(f"data/benchmark_no_vroom{datetime.now()}.csv")
+    df = store.query("SELECT * FROM results WHERE code_version = ?", (version,))
+    df.write_csv(f"data/benchmark_{version}.csv")
+    aggregate(df).write_csv(f"data/benchmark_{version}_summary.csv")
+    if derive_time_limits:
+        traces = store.query(
+            "SELECT * FROM traces WHERE code_version = ?", (version,)
+        )
+        anytime = qualities_at(df, traces, time_limits)
+        anytime.write_csv(f"data/benchmark_{version}_anytime.csv")
+        aggregate(anytime, by=["Solver", "Instance", "At (s)", "Threads"]).write_csv(
+            f"data/benchmark_{version}_anytime_summary.csv"
+        )
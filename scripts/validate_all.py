@@ -1,14 +1,27 @@
-import vrplib
-from pathlib import Path
-from cvrp_solver_comparison.domain.models import Instance, Solution
-from cvrp_solver_comparison.domain.utils import validate
+import sys
+import time
 
+import polars as pl
 
-instance_names = {f.name.split(".")[0] for f in Path("data/X").iterdir() if f.is_file()}
+from cvrp_solver_comparison.benchmark.validation import validate_directory
 
-for name in instance_names:
-    instance = vrplib.read_instance(f"data/X/{name}.vrp")
-    solution = vrplib.read_solution(f"data/X/{name}.sol")
-    instance = Instance.model_validate(instance)
-    solution = Solution.model_validate(solution)
-    validate(solution, instance)
+
+root = sys.argv[1] if len(sys.argv) > 1 else "data"
+
+if __name__ == "__main__":
+    tic = time.time()
+    df = validate_directory(root)
+    toc = time.time()
+
+    summary = df.group_by("Set").agg(
+        pl.len().alias("Instances"),
+        pl.col("Valid").sum().alias("Passed"),
+        (~pl.col("Valid")).sum().alias("Failed"),
+    )
+    failed = df.filter(~pl.col("Valid"))
+    with pl.Config(tbl_rows=-1, fmt_str_lengths=200):
+        print(summary.sort("Set"))
+        if len(failed):
+            print(failed.select("Set", "Instance", "Reason"))
+    print(f"Validated {len(df)} instances in {toc - tic:.2f} s.")
+    sys.exit(1 if len(failed) else 0)
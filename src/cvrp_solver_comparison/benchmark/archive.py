@@ -0,0 +1,220 @@
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import polars as pl
+
+from cvrp_solver_comparison.domain.models import Solution
+from cvrp_solver_comparison.domain.routes import RouteArray, as_route_array
+
+
+_SCHEMA = {
+    "Run Id": pl.String,
+    "Instance": pl.String,
+    "Solver": pl.String,
+    "Time Limit (s)": pl.Int64,
+    "Seed": pl.Int64,
+    "Threads": pl.Int64,
+    "Code Version": pl.String,
+    "Status": pl.String,
+    "Cost": pl.Int64,
+    "created_at": pl.String,
+    "stops": pl.List(pl.Int32),
+    "offsets": pl.List(pl.Int32),
+}
+
+_INDEX_SCHEMA = {
+    "Instance": pl.String,
+    "Cost": pl.Int64,
+    "Run Id": pl.String,
+    "part": pl.String,
+}
+
+
+def run_id(
+    instance: str,
+    solver: str,
+    time_limit: int,
+    seed: int,
+    threads: int,
+    code_version: str,
+) -> str:
+    """Id of a run in the archive, made of the same key as the rows of the ResultStore."""
+    return f"{instance}/{solver}/{time_limit}/{seed}/{threads}/{code_version}"
+
+
+class SolutionArchive:
+    """
+    Archive of the solutions of benchmark runs, as zstd-compressed Parquet.
+
+    Every run is one row with its key, status and cost, and its routes as a
+    RouteArray in two list<int32> columns (stops and offsets). Rows are
+    buffered and written as a new part file every flush_every rows and on
+    close, parts are never rewritten. The best ok solution of every instance
+    is kept in a small index (best.parquet) that points to its part, so
+    best() reads a single part. Reads go part by part, so only one part is
+    ever in memory.
+    """
+
+    def __init__(self, path: str | Path, *, flush_every: int = 100):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._pending: list[dict] = []
+
+    def __enter__(self) -> "SolutionArchive":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def _index_path(self) -> Path:
+        return self.path / "best.parquet"
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.path.glob("part-*.parquet"))
+
+    def append(
+        self,
+        solution: Solution,
+        *,
+        instance: str,
+        solver: str,
+        time_limit: int,
+        seed: int,
+        threads: int,
+        code_version: str,
+        status: str = "ok",
+    ) -> str:
+        """Adds the solution of a run, only solutions with status "ok" can become the best known one; returns the run id."""
+        routes = as_route_array(solution.routes)
+        key = run_id(instance, solver, time_limit, seed, threads, code_version)
+        self._pending.append(
+            {
+                "Run Id": key,
+                "Instance": instance,
+                "Solver": solver,
+                "Time Limit (s)": time_limit,
+                "Seed": seed,
+                "Threads": threads,
+                "Code Version": code_version,
+                "Status": status,
+                "Cost": int(solution.cost),
+                "created_at": datetime.now().isoformat(),
+                "stops": routes.stops,
+                "offsets": routes.offsets.astype("int32"),
+            }
+        )
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+        return key
+
+    def append_row(
+        self, row: dict, *, seed: int, threads: int, code_version: str
+    ) -> str | None:
+        """Adds the solution of a result row of benchmark.runner, if the run returned one."""
+        if row.get("Solution") is None:
+            return None
+        return self.append(
+            row["Solution"],
+            instance=row["Instance"],
+            solver=row["Solver"],
+            time_limit=row["Time Limit (s)"],
+            seed=seed,
+            threads=threads,
+            code_version=code_version,
+            status=row["Status"],
+        )
+
+    def flush(self) -> None:
+        """Writes the buffered solutions as a new part and updates the best known index."""
+        if not self._pending:
+            return
+        frame = pl.DataFrame(
+            {
+                column: pl.Series(
+                    column, [row[column] for row in self._pending], dtype=dtype
+                )
+                for column, dtype in _SCHEMA.items()
+            }
+        )
+        name = f"part-{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+        part = self.path / f"{name}.parquet"
+        tmp = part.with_suffix(".tmp")
+        frame.write_parquet(tmp, compression="zstd")
+        os.replace(tmp, part)
+        self._pending = []
+
+        candidates = frame.filter(pl.col("Status") == "ok").select(
+            "Instance", "Cost", "Run Id", pl.lit(part.name).alias("part")
+        )
+        index = pl.concat([self.index(), candidates])
+        index = (
+            index.sort("Cost", "Run Id")
+            .unique("Instance", keep="first", maintain_order=True)
+            .sort("Instance")
+        )
+        tmp = self._index_path.with_suffix(".tmp")
+        index.write_parquet(tmp)
+        os.replace(tmp, self._index_path)
+
+    def close(self) -> None:
+        self.flush()
+
+    def index(self) -> pl.DataFrame:
+        """Best known (lowest cost, ok) run of every instance, with the part it is stored in."""
+        if not self._index_path.exists():
+            return pl.DataFrame(schema=_INDEX_SCHEMA)
+        return pl.read_parquet(self._index_path)
+
+    def runs(self) -> pl.LazyFrame:
+        """Key, status and cost of all archived runs, without their routes."""
+        parts = self._parts()
+        if not parts:
+            return pl.LazyFrame(schema=_SCHEMA).drop("stops", "offsets")
+        return pl.scan_parquet(parts).drop("stops", "offsets")
+
+    def solutions(
+        self, predicate: pl.Expr | None = None
+    ) -> Iterator[tuple[dict, Solution]]:
+        """
+        Streams the archived runs matching predicate, one part at a time.
+
+        :param predicate: Filter on the columns of runs(), e.g. pl.col("Solver") == "pyvrp"
+        :return: Iterator of (run, solution) with the key, status and cost of the run
+        """
+        for part in self._parts():
+            frame = pl.scan_parquet(part)
+            if predicate is not None:
+                frame = frame.filter(predicate)
+            yield from _solutions(frame.collect())
+
+    def get(self, key: str) -> Solution | None:
+        """The archived solution of a run id, None if there is none."""
+        for _, solution in self.solutions(pl.col("Run Id") == key):
+            return solution
+        return None
+
+    def best(self, instance: str) -> Solution | None:
+        """The best known ok solution of an instance, e.g. as initial solution of a solver."""
+        index = self.index().filter(pl.col("Instance") == instance)
+        if len(index) == 0:
+            return None
+        frame = (
+            pl.scan_parquet(self.path / index["part"][0])
+            .filter(pl.col("Run Id") == index["Run Id"][0])
+            .collect()
+        )
+        return next(_solutions(frame))[1]
+
+
+def _solutions(frame: pl.DataFrame) -> Iterator[tuple[dict, Solution]]:
+    runs = frame.drop("stops", "offsets")
+    for i, run in enumerate(runs.iter_rows(named=True)):
+        routes = RouteArray(
+            frame["stops"][i].to_numpy(), frame["offsets"][i].to_numpy()
+        )
+        yield run, Solution.model_construct(routes=routes, cost=run["Cost"])
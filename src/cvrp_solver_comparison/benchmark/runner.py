@@ -0,0 +1,362 @@
+import multiprocessing
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from pathlib import Path
+
+from cvrp_solver_comparison.domain.cache import load_instance, load_solution
+from cvrp_solver_comparison.domain.fleet import FLEET_ATTEMPTS
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.utils import (
+    InvalidStopError,
+    OrderMissingError,
+    OverloadError,
+    WrongCostError,
+    validate,
+)
+from cvrp_solver_comparison.benchmark.archive import SolutionArchive
+from cvrp_solver_comparison.benchmark.store import ResultStore
+from cvrp_solver_comparison.benchmark.traces import time_to_target
+from cvrp_solver_comparison.solver.instrument import Profiler
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.sandbox import (
+    RunStatus,
+    SandboxResult,
+    run_sandboxed,
+)
+
+
+COLUMNS = [
+    "Instance",
+    "Size",
+    "Time Limit (s)",
+    "Actual Time (s)",
+    "Fleet Attempts",
+    "Solver",
+    "Solution Quality",
+    "Status",
+    "Build Time (s)",
+    "Startup Time (s)",
+    "Solve Time (s)",
+    "Extract Time (s)",
+    "CPU Time (s)",
+    "Peak RSS (MB)",
+    "Best Known Cost",
+    "Time To Target (s)",
+    "Trace",
+    "Solution",
+]
+
+# a run reaches its target once its cost is within TARGET_GAP of the best known cost
+TARGET_GAP = 0.01
+
+# solvers that stop on their own and ignore the time limit, every attempt of
+# theirs may take UNTIMED_LIMIT seconds instead
+UNTIMED_SOLVERS = {"vroom", "savings", "sweep", "nearest_neighbour"}
+UNTIMED_LIMIT = 3600
+
+
+def wall_clock_limit(
+    solver: str, time_limit: int, wall_clock_factor: float = 1.5
+) -> float:
+    """
+    Seconds after which the sandbox kills a solve: every attempt of the fleet
+    growth may take wall_clock_factor * time_limit (UNTIMED_LIMIT for the
+    UNTIMED_SOLVERS), plus 10 s of slack.
+    """
+    attempt = (
+        UNTIMED_LIMIT if solver in UNTIMED_SOLVERS else wall_clock_factor * time_limit
+    )
+    return FLEET_ATTEMPTS * attempt + 10
+
+
+@dataclass(frozen=True)
+class Cell:
+    """One (instance, solver, time_limit, seed, threads) combination of a benchmark sweep."""
+
+    instance: str
+    solver: str
+    time_limit: int
+    seed: int = 0
+    threads: int = 1
+
+    @property
+    def key(self) -> tuple[str, str, int, int, int]:
+        return (self.instance, self.solver, self.time_limit, self.seed, self.threads)
+
+    def options(self, base: SolverOptions | None = None) -> SolverOptions:
+        """base (or the default options) with the seed and threads of this cell."""
+        return (base or SolverOptions()).model_copy(
+            update={"seed": self.seed, "threads": self.threads}
+        )
+
+
+def run_cell(
+    cell: Cell,
+    data_dir: str,
+    *,
+    options: SolverOptions | None = None,
+    profiler: Profiler | None = None,
+    memory_limit_mb: float | None = None,
+    address_space_limit_mb: float | None = None,
+    wall_clock_factor: float = 1.5,
+) -> dict:
+    """
+    Loads the instance of a cell, solves it in a sandboxed child process and
+    returns one result row.
+
+    The "Status" column holds the RunStatus of the sandbox, "infeasible" if
+    the solver finished without a feasible solution on any fleet size, or
+    "invalid" if the returned solution does not pass validate. Runs that
+    are not "ok" get no solution quality. A solve may try FLEET_ATTEMPTS
+    fleet sizes, each with the full time limit. "Fleet Attempts" is the
+    number it took and "Actual Time (s)" the time of all of them, so runs
+    that needed a larger fleet can be told apart from the others. "Trace" is the convergence trace of the solution
+    and "Time To Target (s)" the time it took to get within TARGET_GAP of
+    the best known cost. "Startup Time (s)" is the time the solver process
+    took to import and create the solver before the solve, e.g. starting
+    the JVM and warming up Timefold, which every run pays since every run
+    has a fresh process. The build, solve and extract phases and the CPU
+    time are measured inside the solver process, the peak memory too if the
+    run finished, otherwise it is the highest one the sandbox has seen.
+    "Solution" is the returned solution (also if it is invalid), for the
+    SolutionArchive, the ResultStore does not keep it.
+
+    :param cell: The combination to run
+    :param data_dir: Directory containing <instance>.vrp and <instance>.sol
+    :param options: Solver options, the seed and threads are taken from the cell
+    :param profiler: Profiler of the solve, see solver.instrument.profiled
+    :param memory_limit_mb: Resident memory limit of the solver process
+    :param address_space_limit_mb: Virtual memory limit of the solve, see run_sandboxed
+    :param wall_clock_factor: Factor of the time limit every attempt may take, see wall_clock_limit
+    :return: Row with the columns in COLUMNS
+    """
+    instance_path = f"{data_dir}/{cell.instance}.vrp"
+    instance = load_instance(instance_path)
+    best_solution = load_solution(f"{data_dir}/{cell.instance}.sol")
+
+    result = run_sandboxed(
+        cell.solver,
+        instance_path,
+        cell.time_limit,
+        options=cell.options(options),
+        profiler=profiler,
+        wall_clock_limit=wall_clock_limit(
+            cell.solver, cell.time_limit, wall_clock_factor
+        ),
+        memory_limit_mb=memory_limit_mb,
+        address_space_limit_mb=address_space_limit_mb,
+    )
+    return result_row(cell, instance, best_solution, result)
+
+
+def result_row(
+    cell: Cell, instance: Instance, best_solution: Solution, result: SandboxResult
+) -> dict:
+    """Validates the outcome of a sandboxed run and turns it into a result row."""
+    status = result.status.value
+    quality = None
+    timings = {}
+    peak_rss_mb = result.peak_rss_mb
+    trace = []
+    target_time = None
+    attempts = None
+    if result.status == RunStatus.OK and result.solution is None:
+        status = "infeasible"
+        print(
+            f"Solver {cell.solver} found no feasible solution on instance {cell.instance} with any of {FLEET_ATTEMPTS} fleet sizes."
+        )
+    elif result.status == RunStatus.OK:
+        if (
+            cell.solver not in UNTIMED_SOLVERS
+            and result.solve_time > cell.time_limit * 1.1
+        ):
+            print(
+                f"Warning, solver {cell.solver} took {result.solve_time:2f} s on instance {cell.instance} despite setting a time limit of {cell.time_limit} s."
+            )
+        timings = result.solution.timings
+        attempts = result.solution.fleet_attempts
+        if result.solution.peak_rss_mb is not None:
+            peak_rss_mb = result.solution.peak_rss_mb
+        try:
+            validate(solution=result.solution, instance=instance)
+            quality = float(result.solution.cost / best_solution.cost)
+            trace = result.solution.trace
+            target_time = time_to_target(trace, best_solution.cost * (1 + TARGET_GAP))
+        except (OverloadError, WrongCostError, OrderMissingError, InvalidStopError):
+            status = "invalid"
+    else:
+        print(
+            f"Solver {cell.solver} on instance {cell.instance} ended with status {status}: {result.message}"
+        )
+    solution = result.solution if result.status == RunStatus.OK else None
+    return {
+        "Instance": instance.name,
+        "Size": len(instance.demand),
+        "Time Limit (s)": cell.time_limit,
+        "Actual Time (s)": result.solve_time,
+        "Fleet Attempts": attempts,
+        "Solver": cell.solver,
+        "Solution Quality": quality,
+        "Status": status,
+        "Build Time (s)": timings.get("build"),
+        "Startup Time (s)": result.startup_time,
+        "Solve Time (s)": timings.get("solve"),
+        "Extract Time (s)": timings.get("extract"),
+        "CPU Time (s)": timings.get("cpu"),
+        "Peak RSS (MB)": peak_rss_mb,
+        "Best Known Cost": best_solution.cost,
+        "Time To Target (s)": target_time,
+        "Trace": trace,
+        "Solution": solution,
+    }
+
+
+def crashed_row(cell: Cell, message: str) -> dict:
+    """Result row of a cell whose worker failed before it could return one."""
+    print(
+        f"Solver {cell.solver} on instance {cell.instance} ended with status {RunStatus.CRASHED.value}: {message}"
+    )
+    row = dict.fromkeys(COLUMNS)
+    row.update(
+        {
+            "Instance": cell.instance,
+            "Time Limit (s)": cell.time_limit,
+            "Solver": cell.solver,
+            "Status": RunStatus.CRASHED.value,
+            "Trace": [],
+        }
+    )
+    return row
+
+
+def _pin_worker(cpu_queue) -> None:
+    # Every worker takes one group of cores for its whole lifetime, so that
+    # concurrently running solvers never share a core.
+    cpus = cpu_queue.get()
+    os.sched_setaffinity(0, cpus)
+    threads = str(len(cpus))
+    os.environ["OMP_NUM_THREADS"] = threads
+    os.environ["MKL_NUM_THREADS"] = threads
+
+
+def run_parallel(
+    cells: list[Cell],
+    data_dir: str | Path,
+    *,
+    max_workers: int | None = None,
+    cpus_per_worker: int = 1,
+    pin_cpus: bool = True,
+    options: SolverOptions | None = None,
+    profiler: Profiler | None = None,
+    memory_limit_mb: float | None = None,
+    address_space_limit_mb: float | None = None,
+    wall_clock_factor: float = 1.5,
+    store: ResultStore | None = None,
+    archive: SolutionArchive | None = None,
+    code_version: str | None = None,
+) -> list[dict]:
+    """
+    Runs every cell in its own worker process of a process pool.
+
+    Workers are started with the 'spawn' method (the JVM behind timefold does
+    not survive a fork) and, if pin_cpus is set, each worker is pinned to
+    cpus_per_worker cores of the cores available to this process.
+    Cells with more threads than cpus_per_worker are rejected, they would
+    run on the cores of other workers. A worker that fails (e.g. because
+    the instance cannot be loaded) gives a "crashed" row for its cell, the
+    other cells keep running.
+
+    :param cells: The combinations to run
+    :param data_dir: Directory containing the .vrp and .sol files
+    :param max_workers: Number of concurrent solves, defaults to as many as there are core groups
+    :param cpus_per_worker: Number of cores given to every worker
+    :param pin_cpus: Whether to pin workers to disjoint sets of cores
+    :param options: Solver options, the seed and threads are taken from each cell
+    :param profiler: Profiler of every solve, see solver.instrument.profiled
+    :param memory_limit_mb: Resident memory limit of every solver process
+    :param address_space_limit_mb: Virtual memory limit of every solve, see run_sandboxed
+    :param wall_clock_factor: Factor of the time limit every attempt may take, see wall_clock_limit
+    :param store: If given, cells already stored for code_version are skipped and new rows are appended as they finish
+    :param archive: If given, the solutions of the cells are archived as they finish
+    :param code_version: Code version the rows are stored under, see store.code_version
+    :return: One result row per cell that was run, in order of completion
+    """
+    if store is not None:
+        done = store.done(code_version)
+        skipped = sum(cell.key in done for cell in cells)
+        if skipped:
+            print(f"Skipping {skipped} cells that are already in {store.path}.")
+        cells = [cell for cell in cells if cell.key not in done]
+
+    too_many_threads = [cell for cell in cells if cell.threads > cpus_per_worker]
+    if too_many_threads:
+        raise ValueError(
+            f"{len(too_many_threads)} cells need more threads than the {cpus_per_worker} cores of a worker, e.g. {too_many_threads[0]}."
+        )
+
+    available = sorted(os.sched_getaffinity(0))
+    groups = [
+        set(available[i : i + cpus_per_worker])
+        for i in range(0, len(available) - cpus_per_worker + 1, cpus_per_worker)
+    ]
+    if max_workers is None:
+        max_workers = len(groups)
+    if pin_cpus and max_workers > len(groups):
+        raise ValueError(
+            f"Cannot pin {max_workers} workers to {cpus_per_worker} cores each, only {len(available)} cores are available."
+        )
+
+    context = multiprocessing.get_context("spawn")
+    initializer, initargs = None, ()
+    if pin_cpus:
+        cpu_queue = context.Queue()
+        for group in groups[:max_workers]:
+            cpu_queue.put(group)
+        initializer, initargs = _pin_worker, (cpu_queue,)
+
+    rows = []
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=context,
+        initializer=initializer,
+        initargs=initargs,
+    ) as pool:
+        futures = {
+            pool.submit(
+                run_cell,
+                cell,
+                str(data_dir),
+                options=options,
+                profiler=profiler,
+                memory_limit_mb=memory_limit_mb,
+                address_space_limit_mb=address_space_limit_mb,
+                wall_clock_factor=wall_clock_factor,
+            ): cell
+            for cell in cells
+        }
+        for future in as_completed(futures):
+            try:
+                row = future.result()
+            except Exception:
+                row = crashed_row(futures[future], traceback.format_exc())
+            if store is not None:
+                store.append(
+                    row,
+                    seed=futures[future].seed,
+                    threads=futures[future].threads,
+                    code_version=code_version,
+                )
+            if archive is not None:
+                archive.append_row(
+                    row,
+                    seed=futures[future].seed,
+                    threads=futures[future].threads,
+                    code_version=code_version,
+                )
+            print(
+                f"{row['Instance']} {row['Solver']} {row['Time Limit (s)']} s, {futures[future].threads} threads: {row['Status']} {row['Solution Quality']}"
+            )
+            rows.append(row)
+    return rows
@@ -0,0 +1,85 @@
+import numpy as np
+import polars as pl
+
+
+GROUP = ["Solver", "Instance", "Time Limit (s)", "Threads"]
+
+
+def bootstrap_ci(
+    values: np.ndarray,
+    *,
+    num_resamples: int = 1000,
+    confidence: float = 0.95,
+    rng: np.random.Generator | None = None,
+) -> tuple[float, float]:
+    """
+    Percentile bootstrap confidence interval of the mean of values.
+
+    All resamples are drawn at once as a num_resamples x len(values) matrix.
+    A single value gives the degenerate interval (value, value).
+    """
+    if rng is None:
+        rng = np.random.default_rng(0)
+    values = np.asarray(values, dtype=np.float64)
+    resamples = rng.choice(values, size=(num_resamples, len(values)), replace=True)
+    means = resamples.mean(axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(means, [tail, 100 - tail])
+    return float(low), float(high)
+
+
+def aggregate(
+    results: pl.DataFrame,
+    *,
+    by: list[str] = GROUP,
+    num_resamples: int = 1000,
+    confidence: float = 0.95,
+    seed: int = 0,
+) -> pl.DataFrame:
+    """
+    Statistics of the gap to the best known solution over the seeds of each group of runs.
+
+    The gap of a run is Solution Quality - 1, runs that are not "ok" count
+    in Runs but not in the statistics of the gap.
+
+    :param results: Result rows as returned by ResultStore.query, or qualities_at for the anytime results (with "At (s)" in by)
+    :param by: Columns that identify a group, by default (solver, instance, time limit, threads)
+    :param num_resamples: Number of bootstrap resamples of the mean gap
+    :param confidence: Confidence level of the bootstrap interval
+    :param seed: Seed of the bootstrap, so that the intervals are reproducible
+    :return: One row per group with Runs, Ok Runs, Mean Gap, Median Gap, Std Gap, CI Low and CI High
+    """
+    rng = np.random.default_rng(seed)
+    status = pl.col("Status") == "ok" if "Status" in results.columns else pl.lit(True)
+    frame = results.with_columns(
+        pl.when(status & pl.col("Solution Quality").is_not_null())
+        .then(pl.col("Solution Quality") - 1)
+        .alias("Gap")
+    )
+    summary = frame.group_by(by, maintain_order=True).agg(
+        pl.len().alias("Runs"),
+        pl.col("Gap").count().alias("Ok Runs"),
+        pl.col("Gap").mean().alias("Mean Gap"),
+        pl.col("Gap").median().alias("Median Gap"),
+        pl.col("Gap").std().alias("Std Gap"),
+        pl.col("Gap").drop_nulls().alias("Gaps"),
+    )
+    intervals = [
+        bootstrap_ci(
+            gaps.to_numpy(),
+            num_resamples=num_resamples,
+            confidence=confidence,
+            rng=rng,
+        )
+        if len(gaps)
+        else (None, None)
+        for gaps in summary["Gaps"]
+    ]
+    return (
+        summary.with_columns(
+            pl.Series("CI Low", [low for low, _ in intervals], dtype=pl.Float64),
+            pl.Series("CI High", [high for _, high in intervals], dtype=pl.Float64),
+        )
+        .drop("Gaps")
+        .sort(by)
+    )
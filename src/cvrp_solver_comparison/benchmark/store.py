@@ -0,0 +1,211 @@
+import hashlib
+import sqlite3
+import subprocess
+from datetime import datetime
+from importlib import metadata
+from pathlib import Path
+
+import polars as pl
+
+
+# result row column -> column of the results table
+_DB_COLUMNS = {
+    "Instance": "instance",
+    "Size": "size",
+    "Time Limit (s)": "time_limit",
+    "Actual Time (s)": "actual_time",
+    "Fleet Attempts": "fleet_attempts",
+    "Solver": "solver",
+    "Solution Quality": "solution_quality",
+    "Status": "status",
+    "Build Time (s)": "build_time",
+    "Startup Time (s)": "startup_time",
+    "Solve Time (s)": "solve_time",
+    "Extract Time (s)": "extract_time",
+    "CPU Time (s)": "cpu_time",
+    "Peak RSS (MB)": "peak_rss_mb",
+    "Best Known Cost": "best_known_cost",
+    "Time To Target (s)": "time_to_target",
+    "Seed": "seed",
+    "Threads": "threads",
+    "Code Version": "code_version",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    instance TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    time_limit INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    threads INTEGER NOT NULL,
+    code_version TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    size INTEGER,
+    actual_time REAL,
+    fleet_attempts INTEGER,
+    solution_quality REAL,
+    status TEXT,
+    build_time REAL,
+    startup_time REAL,
+    solve_time REAL,
+    extract_time REAL,
+    cpu_time REAL,
+    peak_rss_mb REAL,
+    best_known_cost INTEGER,
+    time_to_target REAL,
+    PRIMARY KEY (instance, solver, time_limit, seed, threads, code_version)
+)
+"""
+
+# convergence traces of the runs, one row per improvement of the best cost
+_TRACE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS traces (
+    instance TEXT NOT NULL,
+    solver TEXT NOT NULL,
+    time_limit INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    threads INTEGER NOT NULL,
+    code_version TEXT NOT NULL,
+    time REAL NOT NULL,
+    cost INTEGER NOT NULL
+)
+"""
+
+_TRACE_INDEX = """
+CREATE INDEX IF NOT EXISTS traces_key
+ON traces (instance, solver, time_limit, seed, threads, code_version)
+"""
+
+
+def code_version() -> str:
+    """
+    Short git commit of the working tree, or the package version outside of git.
+
+    Uncommitted changes to tracked files add a -dirty-<hash> suffix with a
+    hash of git diff HEAD, so that runs of different uncommitted code (e.g.
+    an edited scripts/run_benchmark.py) get different versions and a resumed
+    sweep only skips the runs of the same code.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+        diff = subprocess.run(
+            ["git", "diff", "HEAD"],
+            capture_output=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout
+        if not diff:
+            return commit
+        return f"{commit}-dirty-{hashlib.sha256(diff).hexdigest()[:8]}"
+    except (OSError, subprocess.CalledProcessError):
+        try:
+            return metadata.version("cvrp-solver-comparison")
+        except metadata.PackageNotFoundError:
+            return "unknown"
+
+
+class ResultStore:
+    """
+    Append-only SQLite store of benchmark result rows.
+
+    Every row is keyed by (instance, solver, time_limit, seed, threads,
+    code_version) and written as soon as its run finishes, so an interrupted
+    sweep can be resumed by skipping the keys that are already done. The
+    convergence trace of a run is stored under the same key in the traces
+    table, e.g. store.query("SELECT * FROM traces").
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute(_SCHEMA)
+        self._connection.execute(_TRACE_SCHEMA)
+        self._connection.execute(_TRACE_INDEX)
+        self._connection.commit()
+
+    def append(
+        self,
+        row: dict,
+        *,
+        seed: int,
+        code_version: str,
+        threads: int = 1,
+    ) -> None:
+        """Writes one result row (with the columns of benchmark.runner.COLUMNS), its Trace goes to the traces table."""
+        values = {
+            _DB_COLUMNS[column]: value
+            for column, value in row.items()
+            if column in _DB_COLUMNS
+        }
+        values["seed"] = seed
+        values["threads"] = threads
+        values["code_version"] = code_version
+        values["created_at"] = datetime.now().isoformat()
+        columns = ", ".join(values)
+        placeholders = ", ".join("?" for _ in values)
+        self._connection.execute(
+            f"INSERT INTO results ({columns}) VALUES ({placeholders})",
+            list(values.values()),
+        )
+        if row.get("Trace"):
+            key = [
+                values["instance"],
+                values["solver"],
+                values["time_limit"],
+                seed,
+                threads,
+                code_version,
+            ]
+            self._connection.executemany(
+                "INSERT INTO traces VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [key + [time, cost] for time, cost in row["Trace"]],
+            )
+        self._connection.commit()
+
+    def done(self, code_version: str) -> set[tuple[str, str, int, int, int]]:
+        """All (instance, solver, time_limit, seed, threads) keys already stored for a code version."""
+        cursor = self._connection.execute(
+            "SELECT instance, solver, time_limit, seed, threads FROM results WHERE code_version = ?",
+            (code_version,),
+        )
+        return set(cursor.fetchall())
+
+    def get(
+        self,
+        instance: str,
+        solver: str,
+        time_limit: int,
+        seed: int,
+        threads: int,
+        code_version: str,
+    ) -> dict | None:
+        """The stored row of one key, with the columns of benchmark.runner.COLUMNS, or None."""
+        frame = self.query(
+            "SELECT * FROM results WHERE instance = ? AND solver = ? AND time_limit = ? AND seed = ? AND threads = ? AND code_version = ?",
+            (instance, solver, time_limit, seed, threads, code_version),
+        )
+        return frame.row(0, named=True) if len(frame) else None
+
+    def query(self, sql: str = "SELECT * FROM results", parameters=()) -> pl.DataFrame:
+        """
+        Runs a query against the results or traces table.
+
+        Columns of the table are renamed to the result row columns, e.g.
+        store.query("SELECT * FROM results WHERE solver = ?", ("pyvrp",)).
+        """
+        cursor = self._connection.execute(sql, parameters)
+        names = [description[0] for description in cursor.description]
+        rows = cursor.fetchall()
+        frame = pl.DataFrame(rows, schema=names, orient="row")
+        renames = {db: column for column, db in _DB_COLUMNS.items() if db in names}
+        return frame.rename(renames)
+
+    def close(self) -> None:
+        self._connection.close()
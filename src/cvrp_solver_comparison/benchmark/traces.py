@@ -0,0 +1,86 @@
+import polars as pl
+
+
+# key columns of a result row, as returned by ResultStore.query
+_KEY = ["Instance", "Solver", "Time Limit (s)", "Seed", "Threads", "Code Version"]
+
+# types of the columns qualities_at reads, a query without rows returns them
+# as columns of type Null, which join_asof cannot join on
+_SCHEMA = {
+    "Instance": pl.String,
+    "Solver": pl.String,
+    "Time Limit (s)": pl.Int64,
+    "Seed": pl.Int64,
+    "Threads": pl.Int64,
+    "Code Version": pl.String,
+    "Status": pl.String,
+    "Size": pl.Int64,
+    "Best Known Cost": pl.Int64,
+    "time": pl.Float64,
+    "cost": pl.Int64,
+}
+
+
+def cost_at(trace: list[tuple[float, int]], seconds: float) -> int | None:
+    """Best cost of a convergence trace after the given seconds, None if there was no solution yet."""
+    cost = None
+    for time, trace_cost in trace:
+        if time > seconds:
+            break
+        cost = trace_cost
+    return cost
+
+
+def time_to_target(trace: list[tuple[float, int]], target: float) -> float | None:
+    """Seconds until the best cost of a convergence trace reached target, None if it never did."""
+    for time, cost in trace:
+        if cost <= target:
+            return time
+    return None
+
+
+def qualities_at(
+    results: pl.DataFrame, traces: pl.DataFrame, time_limits: list[float]
+) -> pl.DataFrame:
+    """
+    Solution quality of every ok run at each of time_limits, read off its trace.
+
+    This turns one long run per instance into the results of the shorter
+    time limits, e.g. a 60 s run gives the quality at 1, 10 and 60 s.
+    Time limits beyond the time limit of a run are left out. Runs without
+    a trace point up to a time limit get no cost there, also if the traces
+    are empty.
+
+    :param results: Result rows as returned by ResultStore.query
+    :param traces: Trace points as returned by ResultStore.query on the traces table
+    :param time_limits: Seconds at which to read the quality
+    :return: One row per run and time limit, with the columns At (s), Cost and Solution Quality
+    """
+    points = (
+        _typed(results, _KEY + ["Status", "Size", "Best Known Cost"])
+        .filter(pl.col("Status") == "ok")
+        .drop("Status")
+        .join(pl.DataFrame({"At (s)": [float(t) for t in time_limits]}), how="cross")
+        .filter(pl.col("At (s)") <= pl.col("Time Limit (s)"))
+        .sort("At (s)")
+    )
+    return (
+        points.join_asof(
+            _typed(traces, _KEY + ["time", "cost"]).sort("time"),
+            left_on="At (s)",
+            right_on="time",
+            by=_KEY,
+            strategy="backward",
+            check_sortedness=False,  # both sides are sorted by time above
+        )
+        .with_columns(
+            (pl.col("cost") / pl.col("Best Known Cost")).alias("Solution Quality")
+        )
+        .rename({"cost": "Cost"})
+        .drop("time")
+        .sort(_KEY + ["At (s)"])
+    )
+
+
+def _typed(frame: pl.DataFrame, columns: list[str]) -> pl.DataFrame:
+    return frame.select(columns).cast({column: _SCHEMA[column] for column in columns})
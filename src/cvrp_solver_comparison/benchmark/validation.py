@@ -0,0 +1,86 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import polars as pl
+
+from cvrp_solver_comparison.domain.cache import load_instance, load_solution
+from cvrp_solver_comparison.domain.utils import check_solution
+
+
+def validate_pair(vrp_path: str, cache_dir: str | None = None) -> dict:
+    """
+    Checks the .sol file next to a .vrp file against the instance.
+
+    :param vrp_path: Path of the .vrp file, the solution is expected at the same path with suffix .sol
+    :param cache_dir: Cache directory passed to load_instance and load_solution
+    :return: Summary row with the reasons of a failure
+    """
+    path = Path(vrp_path)
+    row = {
+        "Set": path.parent.name,
+        "Instance": path.stem,
+        "Size": None,
+        "Cost": None,
+        "Valid": False,
+        "Reason": "",
+    }
+    try:
+        instance = load_instance(path, cache_dir=cache_dir)
+        solution = load_solution(path.with_suffix(".sol"), cache_dir=cache_dir)
+        report = check_solution(solution, instance)
+    except Exception as e:
+        row["Reason"] = f"{type(e).__name__}: {e}"
+        return row
+    row["Size"] = len(instance.demand)
+    row["Cost"] = solution.cost
+    row["Valid"] = report.is_valid
+    row["Reason"] = " ".join(report.errors())
+    return row
+
+
+def validate_directory(
+    root: str | Path,
+    *,
+    pattern: str = "*.vrp",
+    max_workers: int | None = None,
+    cache_dir: str | None = None,
+) -> pl.DataFrame:
+    """
+    Validates every instance/solution pair below a directory on a process pool.
+
+    Instances without a .sol file next to them are skipped. Instances are
+    loaded through the instance cache, so repeated runs do not parse again.
+
+    :param root: Directory that is searched recursively, e.g. data with X, XML100, Golden, ...
+    :param pattern: Glob pattern of the instance files
+    :param max_workers: Number of worker processes, defaults to the number of cores
+    :param cache_dir: Cache directory, defaults to a .cache directory next to every file
+    :return: One row per pair with set, instance, size, cost, pass/fail and the reasons of failures
+    """
+    paths = sorted(
+        str(path)
+        for path in Path(root).rglob(pattern)
+        if path.is_file() and path.with_suffix(".sol").is_file()
+    )
+    if max_workers is None:
+        max_workers = len(os.sched_getaffinity(0))
+    chunksize = max(1, len(paths) // (4 * max_workers))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        rows = list(
+            pool.map(
+                validate_pair,
+                paths,
+                [cache_dir] * len(paths),
+                chunksize=chunksize,
+            )
+        )
+    schema = {
+        "Set": pl.String,
+        "Instance": pl.String,
+        "Size": pl.Int64,
+        "Cost": pl.Int64,
+        "Valid": pl.Boolean,
+        "Reason": pl.String,
+    }
+    return pl.DataFrame(rows, schema=schema)
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import vrplib
+
+from cvrp_solver_comparison.domain.distance import DistanceMatrix
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.routes import RouteArray
+
+
+_ARRAY_FIELDS = ["node_coord", "demand", "depot", "edge_weight"]
+_SCALAR_FIELDS = ["name", "comment", "dimension", "edge_weight_type", "capacity"]
+
+
+def file_hash(path: str | Path) -> str:
+    """sha256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _entry(path: Path, cache_dir: str | Path | None, suffix: str = "") -> Path:
+    """Cache directory of one source file, named after its name and content hash."""
+    if cache_dir is None:
+        cache_dir = path.parent / ".cache"
+    return Path(cache_dir) / f"{path.name}-{file_hash(path)[:16]}{suffix}"
+
+
+def _publish(tmp: Path, entry: Path) -> None:
+    # the rename is atomic, so concurrent workers never see a half written entry
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # another process was faster
+
+
+def load_instance(
+    path: str | Path,
+    *,
+    cache_dir: str | Path | None = None,
+    mmap: bool = True,
+    compute_edge_weights: bool = False,
+) -> Instance:
+    """
+    Reads a VRPLIB instance through an on-disk cache of its parsed arrays.
+
+    On the first call the file is parsed with vrplib and validated, and its
+    arrays are stored as .npy files in cache_dir (default: a .cache directory
+    next to the file). Later calls load these arrays, memory-mapped if mmap is
+    set, and build the Instance without parsing or validating again. Entries
+    are keyed by the hash of the source file, so editing it invalidates them.
+    The rounded distance matrix of the instance is stored in the same entry
+    the first time it is requested.
+
+    By default no dense float edge_weight is computed for instances with
+    coordinates (e.g. EUC_2D), their distances are computed from node_coord
+    when needed, see DistanceMatrix. An explicit EDGE_WEIGHT_SECTION is
+    always read.
+
+    :param path: Path of the .vrp file
+    :param cache_dir: Directory holding the cache entries
+    :param mmap: Whether to memory-map the cached arrays (read-only)
+    :param compute_edge_weights: Whether to build the dense float edge_weight from node_coord (with an entry of its own)
+    :return: The parsed instance
+    """
+    path = Path(path)
+    entry = _entry(path, cache_dir, "" if compute_edge_weights else "-coords")
+    if not entry.is_dir():
+        instance = Instance.model_validate(
+            vrplib.read_instance(path, compute_edge_weights=compute_edge_weights)
+        )
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent))
+        for field in _ARRAY_FIELDS:
+            if getattr(instance, field) is not None:
+                np.save(tmp / f"{field}.npy", getattr(instance, field))
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({field: getattr(instance, field) for field in _SCALAR_FIELDS}, f)
+        _publish(tmp, entry)
+    else:
+        with open(entry / "meta.json") as f:
+            values = json.load(f)
+        for field in _ARRAY_FIELDS:
+            if (entry / f"{field}.npy").exists():
+                values[field] = np.load(
+                    entry / f"{field}.npy", mmap_mode="r" if mmap else None
+                )
+        instance = Instance.model_construct(**values)
+    instance._distances = DistanceMatrix(
+        node_coord=instance.node_coord,
+        edge_weight=instance.edge_weight,
+        rounded_path=entry / "rounded.npy",
+        euclidean=instance.edge_weight_type == "EUC_2D",
+    )
+    return instance
+
+
+def load_solution(path: str | Path, *, cache_dir: str | Path | None = None) -> Solution:
+    """
+    Reads a VRPLIB solution through the same cache as load_instance.
+
+    The routes are cached, and returned, as a RouteArray.
+
+    :param path: Path of the .sol file
+    :param cache_dir: Directory holding the cache entries
+    :return: The parsed solution
+    """
+    path = Path(path)
+    # the suffix keeps these entries apart from older ones with JSON routes
+    entry = _entry(path, cache_dir, "-csr")
+    if not entry.is_dir():
+        solution = Solution.model_validate(vrplib.read_solution(path))
+        solution.routes = RouteArray.from_lists(solution.routes)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = Path(tempfile.mkdtemp(dir=entry.parent))
+        solution.routes.save(tmp)
+        with open(tmp / "meta.json", "w") as f:
+            json.dump({"cost": int(solution.cost)}, f)
+        _publish(tmp, entry)
+        return solution
+
+    with open(entry / "meta.json") as f:
+        cost = json.load(f)["cost"]
+    return Solution.model_construct(routes=RouteArray.load(entry), cost=cost)
@@ -0,0 +1,189 @@
+import numpy as np
+
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.utils import calculate_cost
+
+
+def _savings_pairs(
+    instance: Instance, num_neighbours: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Customer pairs i < j among the nearest neighbours, by decreasing positive saving."""
+    neighbours = instance.distances.neighbours(num_neighbours)[1:]
+    n = len(neighbours) + 1
+    first = np.repeat(np.arange(1, n), neighbours.shape[1])
+    second = neighbours.ravel()
+    # every pair as one int, duplicates are next to each other once sorted
+    pairs = np.sort(np.minimum(first, second) * n + np.maximum(first, second))
+    pairs = pairs[np.concatenate([[True], pairs[1:] != pairs[:-1]])]
+    first, second = pairs // n, pairs % n
+    depot = np.zeros_like(first)
+    distances = instance.distances
+    savings = (
+        distances.arcs(depot, first)
+        + distances.arcs(second, depot)
+        - distances.arcs(first, second)
+    )
+    order = np.argsort(-savings, kind="stable")
+    order = order[savings[order] > 0]
+    return first[order], second[order]
+
+
+def clarke_wright(instance: Instance, *, num_neighbours: int = 40) -> Solution:
+    """
+    Clarke-Wright savings heuristic (parallel version).
+
+    Starts with one route per customer and merges the routes at the two ends
+    of an arc (i, j) in order of decreasing saving d(0, i) + d(j, 0) - d(i, j),
+    as long as the merged route fits into a vehicle. Savings are only computed
+    for the num_neighbours nearest neighbours of every customer, the others
+    are hardly ever merged and would make the savings list quadratic. The
+    depot is assumed to be node 0, like all solvers do.
+
+    :param instance: Instance to build routes for
+    :param num_neighbours: Number of neighbours per customer with a saving
+    :return: Solution with one route per vehicle, the number of vehicles is not limited
+    """
+    n = len(instance.demand)
+    demand = np.asarray(instance.demand).tolist()
+    capacity = instance.capacity
+    route_of = list(range(n))
+    routes = {i: [i] for i in range(1, n)}
+    loads = {i: demand[i] for i in range(1, n)}
+
+    first, second = _savings_pairs(instance, num_neighbours)
+    for i, j in zip(first.tolist(), second.tolist()):
+        a, b = route_of[i], route_of[j]
+        if a == b or loads[a] + loads[b] > capacity:
+            continue
+        route_a, route_b = routes[a], routes[b]
+        # i has to be the last stop of its route and j the first of its own
+        if route_a[-1] != i:
+            if route_a[0] != i:
+                continue
+            route_a = route_a[::-1]
+        if route_b[0] != j:
+            if route_b[-1] != j:
+                continue
+            route_b = route_b[::-1]
+        keep, drop = (a, b) if len(route_a) >= len(route_b) else (b, a)
+        for stop in routes[drop]:
+            route_of[stop] = keep
+        routes[keep] = route_a + route_b
+        loads[keep] += loads.pop(drop)
+        del routes[drop]
+
+    solution = Solution(routes=list(routes.values()), cost=0)
+    solution.cost = calculate_cost(solution, instance)
+    return solution
+
+
+def _nearest_neighbour_order(route: list[int], instance: Instance) -> list[int]:
+    """The stops of a route, reordered by the nearest neighbour rule starting at the depot."""
+    stops = np.array([0] + route, dtype=np.int64)
+    frm, to = np.meshgrid(stops, stops, indexing="ij")
+    distances = instance.distances.arcs(frm.ravel(), to.ravel())
+    distances = distances.reshape(len(stops), len(stops)).astype(np.float64)
+    distances[:, 0] = np.inf
+    order, current = [], 0
+    for _ in range(len(route)):
+        following = int(np.argmin(distances[current]))
+        distances[:, following] = np.inf
+        order.append(route[following - 1])
+        current = following
+    return order
+
+
+def sweep(instance: Instance) -> Solution:
+    """
+    Sweep heuristic.
+
+    Orders the customers by their polar angle around the depot, starting
+    after the largest angular gap between two customers, and cuts this order
+    into routes whenever the next customer does not fit into the vehicle.
+    The stops of every route are then visited in nearest neighbour order
+    instead of their angular order. Needs node_coord.
+    """
+    if instance.node_coord is None:
+        raise ValueError(
+            f"The sweep heuristic needs node_coord, {instance.name} has none."
+        )
+    coords = np.asarray(instance.node_coord, dtype=np.float64)
+    offsets = coords[1:] - coords[0]
+    angles = np.arctan2(offsets[:, 1], offsets[:, 0])
+    order = np.argsort(angles, kind="stable")
+    gaps = np.diff(np.append(angles[order], angles[order[0]] + 2 * np.pi))
+    order = np.roll(order, -(int(np.argmax(gaps)) + 1)) + 1
+
+    demand = np.asarray(instance.demand).tolist()
+    routes, route, load = [], [], 0
+    for customer in order.tolist():
+        if route and load + demand[customer] > instance.capacity:
+            routes.append(route)
+            route, load = [], 0
+        route.append(customer)
+        load += demand[customer]
+    if route:
+        routes.append(route)
+
+    solution = Solution(
+        routes=[_nearest_neighbour_order(route, instance) for route in routes], cost=0
+    )
+    solution.cost = calculate_cost(solution, instance)
+    return solution
+
+
+def nearest_neighbour(instance: Instance, *, num_neighbours: int = 40) -> Solution:
+    """
+    Nearest neighbour heuristic with capacity.
+
+    Every route starts at the depot and moves on to the nearest unvisited
+    customer that still fits into the vehicle, until there is none. The
+    candidates are first taken from the num_neighbours nearest neighbours of
+    the current stop, only if none of them qualifies all distances from it
+    are looked at.
+    """
+    neighbours = instance.distances.neighbours(num_neighbours).tolist()
+    demand = np.asarray(instance.demand, dtype=np.int64)
+    demand_list = demand.tolist()
+    capacity = instance.capacity
+    n = len(demand_list)
+    visited = [False] * n
+    visited[0] = True
+    unvisited = np.ones(n, dtype=bool)
+    unvisited[0] = False
+    remaining = n - 1
+
+    routes = []
+    while remaining:
+        route, load, current = [], 0, 0
+        while True:
+            following = None
+            if current != 0:
+                for candidate in neighbours[current]:
+                    if visited[candidate]:
+                        continue
+                    if load + demand_list[candidate] <= capacity:
+                        following = candidate
+                        break
+            if following is None:
+                feasible = unvisited & (demand <= capacity - load)
+                if not feasible.any():
+                    break
+                row = instance.distances.rows(current, current + 1)[0]
+                row[~feasible] = np.inf
+                following = int(np.argmin(row))
+            route.append(following)
+            load += demand_list[following]
+            visited[following] = True
+            unvisited[following] = False
+            remaining -= 1
+            current = following
+        if not route:
+            raise ValueError(
+                f"Customers of {instance.name} have a demand above the capacity."
+            )
+        routes.append(route)
+
+    solution = Solution(routes=routes, cost=0)
+    solution.cost = calculate_cost(solution, instance)
+    return solution
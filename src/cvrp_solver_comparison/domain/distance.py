@@ -0,0 +1,150 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+# number of matrix entries computed at once when rounding chunk-wise
+_CHUNK_ENTRIES = 1 << 24
+
+
+class DistanceMatrix:
+    """
+    Distances between the nodes of an instance.
+
+    Backed by the dense edge_weight matrix if there is one, otherwise
+    distances are computed on demand as EUC_2D distances from node_coord.
+    The rounded int32 matrix that all solvers consume is computed once,
+    chunk-wise, and if rounded_path is given it is stored there as a .npy
+    file and memory-mapped, so it is shared between runs and processes.
+    Neighbour lists are cached the same way, next to rounded_path.
+    """
+
+    def __init__(
+        self,
+        *,
+        node_coord: np.ndarray | None = None,
+        edge_weight: np.ndarray | None = None,
+        rounded_path: str | Path | None = None,
+        euclidean: bool = False,
+    ):
+        """
+        :param euclidean: Whether edge_weight holds the Euclidean distances between node_coord (always the case without edge_weight)
+        """
+        if node_coord is None and edge_weight is None:
+            raise ValueError("A distance matrix needs node_coord or edge_weight.")
+        self.node_coord = node_coord
+        self.edge_weight = edge_weight
+        self.rounded_path = None if rounded_path is None else Path(rounded_path)
+        self.euclidean = edge_weight is None or (euclidean and node_coord is not None)
+        self._rounded = None
+        self._neighbours = {}
+
+    def __len__(self) -> int:
+        if self.edge_weight is not None:
+            return len(self.edge_weight)
+        return len(self.node_coord)
+
+    def rows(self, start: int, stop: int) -> np.ndarray:
+        """Unrounded float64 distances from the nodes start..stop-1 to all nodes, as a new array."""
+        if self.edge_weight is not None:
+            return np.array(self.edge_weight[start:stop], dtype=np.float64)
+        coords = np.asarray(self.node_coord, dtype=np.float64)
+        diff = coords[start:stop, None, :] - coords[None, :, :]
+        return np.sqrt((diff**2).sum(axis=-1))
+
+    def arcs(self, frm: np.ndarray, to: np.ndarray) -> np.ndarray:
+        """Rounded distances of the arcs frm[i] -> to[i], without building the full matrix."""
+        if self._rounded is not None:
+            return self._rounded[frm, to].astype(np.int64)
+        if self.edge_weight is not None:
+            return np.rint(self.edge_weight[frm, to]).astype(np.int64)
+        coords = np.asarray(self.node_coord, dtype=np.float64)
+        diff = coords[frm] - coords[to]
+        return np.rint(np.sqrt((diff**2).sum(axis=-1))).astype(np.int64)
+
+    def rounded(self) -> np.ndarray:
+        """
+        The n x n matrix of distances rounded to the nearest integer, as int32.
+
+        Computed on first access and returned without copying afterwards.
+        Treat it as read-only, it may be a memory-mapped file.
+        """
+        if self._rounded is not None:
+            return self._rounded
+        if self.rounded_path is not None and self.rounded_path.exists():
+            self._rounded = np.load(self.rounded_path, mmap_mode="r")
+            return self._rounded
+
+        n = len(self)
+        if self.rounded_path is None:
+            rounded = np.empty((n, n), dtype=np.int32)
+        else:
+            tmp = self.rounded_path.with_suffix(f".{os.getpid()}.tmp")
+            rounded = np.lib.format.open_memmap(
+                tmp, mode="w+", dtype=np.int32, shape=(n, n)
+            )
+        step = max(1, _CHUNK_ENTRIES // max(n, 1))
+        for start in range(0, n, step):
+            stop = min(n, start + step)
+            np.rint(self.rows(start, stop), out=rounded[start:stop], casting="unsafe")
+
+        if self.rounded_path is not None:
+            rounded.flush()
+            del rounded
+            os.replace(tmp, self.rounded_path)
+            rounded = np.load(self.rounded_path, mmap_mode="r")
+        self._rounded = rounded
+        return rounded
+
+    def neighbours(self, k: int) -> np.ndarray:
+        """
+        The k nearest customers of every node, as an n x k int32 array.
+
+        Row i lists the customers closest to node i, sorted by distance,
+        never i itself nor the depot (node 0), whose arcs to and from every
+        customer are always candidates. With Euclidean distances they are
+        found with a KD-tree on node_coord in O(n k log n), otherwise the
+        distances are looked at chunk-wise. Computed once per k, and stored
+        next to rounded_path if that is given.
+        """
+        n = len(self)
+        k = max(0, min(k, n - 2))
+        if k in self._neighbours:
+            return self._neighbours[k]
+        path = None
+        if self.rounded_path is not None:
+            path = self.rounded_path.with_name(f"neighbours-{k}.npy")
+            if path.exists():
+                self._neighbours[k] = np.load(path, mmap_mode="r")
+                return self._neighbours[k]
+
+        if k == 0:
+            neighbours = np.empty((n, 0), dtype=np.int32)
+        elif self.euclidean:
+            coords = np.asarray(self.node_coord, dtype=np.float64)
+            # the node itself and the depot are among the k + 2 nearest at most
+            _, candidates = cKDTree(coords).query(coords, k=k + 2)
+            valid = (candidates != np.arange(n)[:, None]) & (candidates != 0)
+            first_valid = np.argsort(~valid, axis=1, kind="stable")[:, :k]
+            neighbours = np.take_along_axis(candidates, first_valid, axis=1)
+        else:
+            neighbours = np.empty((n, k), dtype=np.int32)
+            step = max(1, _CHUNK_ENTRIES // max(n, 1))
+            for start in range(0, n, step):
+                stop = min(n, start + step)
+                rows = self.rows(start, stop)
+                rows[:, 0] = np.inf
+                rows[np.arange(stop - start), np.arange(start, stop)] = np.inf
+                nearest = np.argpartition(rows, k - 1, axis=1)[:, :k]
+                order = np.argsort(np.take_along_axis(rows, nearest, axis=1), axis=1)
+                neighbours[start:stop] = np.take_along_axis(nearest, order, axis=1)
+        neighbours = neighbours.astype(np.int32, copy=False)
+
+        if path is not None:
+            tmp = path.with_suffix(f".{os.getpid()}.tmp.npy")
+            np.save(tmp, neighbours)
+            os.replace(tmp, path)
+        self._neighbours[k] = neighbours
+        return neighbours
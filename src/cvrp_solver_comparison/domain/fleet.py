@@ -0,0 +1,61 @@
+import math
+import re
+
+import numpy as np
+
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.routes import as_route_array
+
+# fleet sizes a solver is run with, growing by grow_fleet, before giving up
+FLEET_ATTEMPTS = 3
+
+
+def min_vehicles(instance: Instance) -> int:
+    """Trivial lower bound on the number of vehicles: ceil(sum(demand) / capacity)."""
+    return max(1, math.ceil(int(np.sum(instance.demand)) / instance.capacity))
+
+
+def vehicles_from_name(name: str) -> int | None:
+    """Number of vehicles encoded in the instance name, e.g. 25 for X-n101-k25."""
+    match = re.search(r"-k(\d+)", name)
+    return int(match.group(1)) if match else None
+
+
+def fleet_size(instance: Instance, *, slack: float = 0.1, min_slack: int = 2) -> int:
+    """
+    Tight upper bound on the number of vehicles a solver gets.
+
+    Starts from the larger of the capacity lower bound and the k in the
+    instance name (the number of routes of the best known solution for the
+    X and similar sets) and adds slack * that many, at least min_slack,
+    vehicles. Never more than one vehicle per customer.
+
+    :param instance: Instance to size the fleet for
+    :param slack: Relative number of extra vehicles
+    :param min_slack: Minimal number of extra vehicles
+    :return: Number of vehicles
+    """
+    base = max(min_vehicles(instance), vehicles_from_name(instance.name) or 0)
+    extra = max(min_slack, math.ceil(slack * base))
+    return max(1, min(len(instance.demand) - 1, base + extra))
+
+
+def grow_fleet(num_vehicles: int, instance: Instance, *, factor: float = 1.5) -> int:
+    """Next fleet size to try after a solver found no feasible solution with num_vehicles."""
+    return max(1, min(len(instance.demand) - 1, math.ceil(num_vehicles * factor)))
+
+
+def initial_routes(initial: Solution | None) -> list[list[int]]:
+    """The non-empty routes of an initial solution as lists of ints, no routes without one."""
+    if initial is None:
+        return []
+    return [route.tolist() for route in as_route_array(initial.routes) if len(route)]
+
+
+def fleet_for(
+    instance: Instance, num_vehicles: int | None, initial: Solution | None = None
+) -> int:
+    """num_vehicles (default fleet_size(instance)), raised to the number of routes of an initial solution."""
+    if num_vehicles is None:
+        num_vehicles = fleet_size(instance)
+    return max(num_vehicles, len(initial_routes(initial)))
@@ -1,6 +1,9 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 import numpy as np
 
+from cvrp_solver_comparison.domain.distance import DistanceMatrix
+from cvrp_solver_comparison.domain.routes import RouteArray
+
 
 class Instance(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -12,10 +15,34 @@ class Instance(BaseModel):
     node_coord: np.ndarray  # n x 2 matrix
     demand: np.ndarray  #  n vector
     depot: np.ndarray  # only 1 entry
-    edge_weight: np.ndarray  # n x n matrix
+    edge_weight: np.ndarray | None = None  # n x n matrix, None: computed from node_coord
+    _distances: DistanceMatrix | None = PrivateAttr(default=None)
+
+    @property
+    def distances(self) -> DistanceMatrix:
+        """Distance matrix shared by all consumers of this instance."""
+        if self._distances is None:
+            self._distances = DistanceMatrix(
+                node_coord=self.node_coord,
+                edge_weight=self.edge_weight,
+                euclidean=self.edge_weight_type == "EUC_2D",
+            )
+        return self._distances
+
+    def neighbours(self, k: int) -> np.ndarray:
+        """The k nearest customers of every node, see DistanceMatrix.neighbours."""
+        return self.distances.neighbours(k)
 
 
 class Solution(BaseModel):
     model_config = ConfigDict(arbitrary_types_allowed=True)
-    routes: list
+    routes: list | RouteArray  # lists of stops, or all stops in one array, see RouteArray
     cost: int
+    timings: dict[str, float] = Field(
+        default_factory=dict
+    )  # seconds per phase of the solver run, e.g. "build", "solve" and "extract"
+    trace: list[tuple[float, int]] = Field(
+        default_factory=list
+    )  # (seconds into the solve, cost) of every improvement of the best solution
+    peak_rss_mb: float | None = None  # peak resident memory of the solver process
+    fleet_attempts: int = 1  # fleet sizes tried until this solution, see solver.with_fleet_growth
@@ -0,0 +1,114 @@
+from itertools import chain
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+
+
+class RouteArray:
+    """
+    Routes of a solution in compressed sparse row form.
+
+    The stops of all routes are stored back to back in one int32 array and
+    route i is stops[offsets[i]:offsets[i + 1]], so a solution takes 4 bytes
+    per stop plus 8 per route, instead of a Python list per route and an
+    int object per stop, and pickles as two arrays. Indexing and iterating
+    give views of stops, no copies.
+    """
+
+    def __init__(self, stops: np.ndarray, offsets: np.ndarray):
+        """
+        :param stops: Customers of all routes, back to back
+        :param offsets: Start of every route in stops, followed by len(stops)
+        """
+        self.stops = np.asarray(stops, dtype=np.int32)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if (
+            self.offsets.ndim != 1
+            or len(self.offsets) == 0
+            or self.offsets[0] != 0
+            or self.offsets[-1] != len(self.stops)
+            or np.any(np.diff(self.offsets) < 0)
+        ):
+            raise ValueError("offsets must rise from 0 to the number of stops.")
+
+    @classmethod
+    def from_lists(cls, routes: list) -> "RouteArray":
+        """Routes as lists (or arrays) of stops, e.g. Solution.routes of the solvers."""
+        lengths = np.fromiter(map(len, routes), dtype=np.int64, count=len(routes))
+        stops = np.fromiter(
+            chain.from_iterable(routes), dtype=np.int32, count=int(lengths.sum())
+        )
+        return cls(stops, np.concatenate([[0], np.cumsum(lengths)]))
+
+    @classmethod
+    def from_route_ids(cls, stops: np.ndarray, route_ids: np.ndarray) -> "RouteArray":
+        """
+        Stops together with the route each of them is on, in which the stops
+        of a route are contiguous, e.g. the steps of a vroom solution. Route
+        ids only have to change between routes, not be numbered from 0.
+        """
+        route_ids = np.asarray(route_ids)
+        if len(route_ids) == 0:
+            return cls(stops, [0])
+        starts = np.flatnonzero(route_ids[1:] != route_ids[:-1]) + 1
+        return cls(stops, np.concatenate([[0], starts, [len(route_ids)]]))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        if not -len(self) <= i < len(self):
+            raise IndexError(f"route {i} out of range for {len(self)} routes")
+        i %= len(self)
+        return self.stops[self.offsets[i] : self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(np.split(self.stops, self.offsets[1:-1]))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, RouteArray):
+            return np.array_equal(self.stops, other.stops) and np.array_equal(
+                self.offsets, other.offsets
+            )
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"RouteArray({len(self)} routes, {len(self.stops)} stops)"
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of stops of every route."""
+        return np.diff(self.offsets)
+
+    def route_ids(self) -> np.ndarray:
+        """Index of the route of every stop."""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def tolist(self) -> list[list[int]]:
+        """The routes as lists of ints."""
+        return [route.tolist() for route in self]
+
+    def save(self, path: str | Path) -> None:
+        """Writes the stops and offsets into directory path as stops.npy and offsets.npy."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / "stops.npy", self.stops)
+        np.save(path / "offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, path: str | Path, *, mmap: bool = True) -> "RouteArray":
+        """Reads routes written by save, memory-mapped if mmap is set."""
+        path = Path(path)
+        mode = "r" if mmap else None
+        return cls(
+            np.load(path / "stops.npy", mmap_mode=mode),
+            np.load(path / "offsets.npy", mmap_mode=mode),
+        )
+
+
+def as_route_array(routes) -> RouteArray:
+    """routes as a RouteArray, converted from lists if they are no RouteArray yet."""
+    if isinstance(routes, RouteArray):
+        return routes
+    return RouteArray.from_lists(routes)
@@ -0,0 +1,130 @@
+import queue
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from cvrp_solver_comparison.domain.cache import load_instance, load_solution
+from cvrp_solver_comparison.domain.models import Instance, Solution
+
+
+def dimension(path: str | Path) -> int | None:
+    """DIMENSION of a VRPLIB instance, read from its header without parsing the file."""
+    with open(path) as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            key = key.strip().upper()
+            if key == "DIMENSION":
+                return int(value.strip())
+            if key.endswith("_SECTION"):
+                return None
+    return None
+
+
+def find_instances(
+    sources: str | Path | Iterable[str | Path],
+    *,
+    pattern: str = "*.vrp",
+    min_size: int | None = None,
+    max_size: int | None = None,
+    shard: tuple[int, int] | None = None,
+) -> list[Path]:
+    """
+    Instance files of a benchmark set, sorted by name.
+
+    The size of an instance is its dimension (the depot included, like the
+    Size column of the results), read from the header of the file. With a
+    shard (index, count), the instances are dealt out round-robin in order
+    of size to count shards and only shard index is kept, so every machine
+    of a split sweep gets a similar mix of sizes.
+
+    :param sources: Directories to search with pattern, or instance files
+    :param pattern: Glob of the instance files in the directories, e.g. "X-n1??-*.vrp"
+    :param min_size: Smallest dimension to keep
+    :param max_size: Largest dimension to keep
+    :param shard: (index, count) of the shard to keep, None for all instances
+    :return: Paths of the instances
+    """
+    if isinstance(sources, (str, Path)):
+        sources = [sources]
+    paths = []
+    for source in map(Path, sources):
+        paths.extend(sorted(source.glob(pattern)) if source.is_dir() else [source])
+
+    needs_size = min_size is not None or max_size is not None or shard is not None
+    sizes = {}
+    for path in paths:
+        size = dimension(path) if needs_size else None
+        if min_size is not None and (size is None or size < min_size):
+            continue
+        if max_size is not None and (size is None or size > max_size):
+            continue
+        sizes[path] = size
+    if shard is not None:
+        index, count = shard
+        if not 0 <= index < count:
+            raise ValueError(f"Shard {index} does not exist among {count} shards.")
+        by_size = sorted(sizes, key=lambda path: (sizes[path] or 0, path.name))
+        sizes = {path: sizes[path] for path in by_size[index::count]}
+    return sorted(sizes, key=lambda path: path.name)
+
+
+def iter_instances(
+    paths: Iterable[str | Path],
+    *,
+    prefetch: int = 2,
+    solutions: bool = True,
+    cache_dir: str | Path | None = None,
+) -> Iterator[tuple[Instance, Solution | None]]:
+    """
+    Loads instances, and their .sol files, in a background thread.
+
+    Up to prefetch instances are loaded ahead of the one being used, so
+    parsing the next instances overlaps with solving the current one, e.g.
+    while the solver runs in a sandboxed child process. Errors of loading
+    are raised where the instance would have been yielded.
+
+    :param paths: Instance files, e.g. from find_instances
+    :param prefetch: Number of instances loaded ahead
+    :param solutions: Whether to load the best known solution <name>.sol next to every instance, None if there is none
+    :param cache_dir: Cache directory of load_instance and load_solution
+    :return: Iterator of (instance, best known solution)
+    """
+    loaded = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        # gives up once the consumer is gone, instead of blocking forever
+        while not stop.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def load() -> None:
+        try:
+            for path in map(Path, paths):
+                instance = load_instance(path, cache_dir=cache_dir)
+                solution = None
+                solution_path = path.with_suffix(".sol")
+                if solutions and solution_path.exists():
+                    solution = load_solution(solution_path, cache_dir=cache_dir)
+                if not put((instance, solution)):
+                    return
+        except BaseException as error:
+            put(error)
+            return
+        put(done)
+
+    loader = threading.Thread(target=load, name="instance-prefetch", daemon=True)
+    loader.start()
+    try:
+        while (item := loaded.get()) is not done:
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        loader.join()
@@ -1,4 +1,8 @@
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.routes import as_route_array
 
 
 class OverloadError(Exception):
@@ -13,6 +17,134 @@ class WrongCostError(Exception):
     pass
 
 
+class InvalidStopError(Exception):
+    pass
+
+
+class ValidationReport(BaseModel):
+    """Outcome of checking a solution against an instance, see check_solution."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    instance: str
+    capacity: int
+    route_loads: np.ndarray  # load of every route
+    route_costs: np.ndarray  # rounded distance of every route
+    total_cost: int
+    reported_cost: int
+    missing: np.ndarray  # customers that are not visited
+    duplicates: np.ndarray  # customers that are visited more than once
+    invalid_stops: np.ndarray  # stops that are no customer, e.g. the depot
+
+    @property
+    def overloaded_routes(self) -> np.ndarray:
+        return np.flatnonzero(self.route_loads > self.capacity)
+
+    @property
+    def cost_matches(self) -> bool:
+        return self.total_cost == self.reported_cost
+
+    @property
+    def is_valid(self) -> bool:
+        return (
+            len(self.overloaded_routes) == 0
+            and self.cost_matches
+            and len(self.missing) == 0
+            and len(self.duplicates) == 0
+            and len(self.invalid_stops) == 0
+        )
+
+    def errors(self) -> list[str]:
+        """Human readable description of every violation."""
+        errors = [
+            f"Tour {i} for instance {self.instance} not feasible: {self.route_loads[i]}/{self.capacity} load."
+            for i in self.overloaded_routes
+        ]
+        if not self.cost_matches:
+            errors.append(
+                f"Scores for instance {self.instance} do not match: Calculated vs in-data: {self.total_cost} vs {self.reported_cost}"
+            )
+        if len(self.missing):
+            errors.append(
+                f"For instance {self.instance}, the following orders were not served: {set(self.missing.tolist())}"
+            )
+        if len(self.duplicates):
+            errors.append(
+                f"For instance {self.instance}, the following orders were served more than once: {set(self.duplicates.tolist())}"
+            )
+        if len(self.invalid_stops):
+            errors.append(
+                f"For instance {self.instance}, the following stops are no orders: {set(self.invalid_stops.tolist())}"
+            )
+        return errors
+
+
+def _flatten(routes) -> tuple[np.ndarray, np.ndarray]:
+    """Concatenated stops of all routes and the route index of every stop, as stored by a RouteArray."""
+    routes = as_route_array(routes)
+    return routes.stops, routes.route_ids()
+
+
+def _route_costs(
+    stops: np.ndarray, route_ids: np.ndarray, num_routes: int, instance: Instance
+) -> np.ndarray:
+    """Rounded distance of every route, including the arcs from and to the depot."""
+    depot = instance.depot[0]
+    if len(stops) == 0:
+        return np.zeros(num_routes, dtype=np.int64)
+    first = np.ones(len(stops), dtype=bool)
+    first[1:] = route_ids[1:] != route_ids[:-1]
+    last = np.ones(len(stops), dtype=bool)
+    last[:-1] = first[1:]
+
+    previous = np.empty_like(stops)
+    previous[1:] = stops[:-1]
+    previous[first] = depot
+    arcs = instance.distances.arcs(previous, stops)
+    back = instance.distances.arcs(stops[last], np.full(last.sum(), depot))
+    costs = np.bincount(route_ids, weights=arcs, minlength=num_routes)
+    costs += np.bincount(route_ids[last], weights=back, minlength=num_routes)
+    return np.rint(costs).astype(np.int64)
+
+
+def check_solution(solution: Solution, instance: Instance) -> ValidationReport:
+    """
+    Checks capacity, cost and coverage of all routes of a solution at once.
+
+    Unlike validate, this does not stop at the first violation but reports
+    the load and cost of every route and all missing, duplicate and invalid
+    stops.
+
+    :param solution: Solution to check
+    :param instance: Instance the solution belongs to
+    :return: Report of the check
+    """
+    n = len(instance.demand)
+    stops, route_ids = _flatten(solution.routes)
+    invalid_stops = np.unique(stops[(stops < 1) | (stops >= n)])
+    # the depot has no demand and is a valid location, so only stops that are
+    # no location at all are left out of loads and costs
+    in_range = (stops >= 0) & (stops < n)
+    stops, route_ids = stops[in_range], route_ids[in_range]
+
+    num_routes = len(solution.routes)
+    demand = np.asarray(instance.demand)
+    route_loads = np.bincount(route_ids, weights=demand[stops], minlength=num_routes)
+    route_costs = _route_costs(stops, route_ids, num_routes, instance)
+
+    visits = np.bincount(stops, minlength=n)
+    return ValidationReport(
+        instance=instance.name,
+        capacity=instance.capacity,
+        route_loads=np.rint(route_loads).astype(np.int64),
+        route_costs=route_costs,
+        total_cost=int(route_costs.sum()),
+        reported_cost=solution.cost,
+        missing=np.flatnonzero(visits[1:] == 0) + 1,
+        duplicates=np.flatnonzero(visits[1:] > 1) + 1,
+        invalid_stops=invalid_stops,
+    )
+
+
 def validate(solution: Solution, instance: Instance) -> bool:
     """
     Validates whether all tours of a solution are feasible regarding capacity constraint and whether the costs are correct
@@ -24,44 +156,29 @@ def validate(solution: Solution, instance: Instance) -> bool:
     :return: Description
     :rtype: bool
     """
-
-    for i, route in enumerate(solution.routes):
-        load = get_load(route, instance)
-
-        if load > instance.capacity:
-            raise OverloadError(
-                f"Tour {i} for instance {instance.name} not feasible: {load}/{instance.capacity} load."
-            )
-    total_cost = calculate_cost(solution=solution, instance=instance)
-    if total_cost != solution.cost:
-        raise WrongCostError(
-            f"Scores for instance {instance.name} do not match: Calculated vs in-data: {total_cost} vs {solution.cost}"
-        )
-    orders = set(i for i in range(1, len(instance.demand)))
-    for route in solution.routes:
-        for stop in route:
-            orders.remove(stop)
-    if len(orders) > 0:
-        raise OrderMissingError(
-            f"For instance {instance.name}, the following orders were not served: {orders}"
-        )
+    report = check_solution(solution, instance)
+    errors = report.errors()
+    if len(report.overloaded_routes):
+        raise OverloadError(errors[0])
+    if not report.cost_matches:
+        raise WrongCostError(errors[0])
+    if len(report.missing):
+        raise OrderMissingError(errors[0])
+    if len(report.duplicates) or len(report.invalid_stops):
+        raise InvalidStopError(errors[0])
     print(f"Instance and solution file for instance {instance.name} match.")
     return True
 
 
 def calculate_cost(solution: Solution, instance: Instance) -> int:
-    return sum(get_distance(route, instance=instance) for route in solution.routes)
+    stops, route_ids = _flatten(solution.routes)
+    return int(_route_costs(stops, route_ids, len(solution.routes), instance).sum())
 
 
 def get_distance(route: list, instance: Instance) -> float:
-    depot = instance.depot[0]
-    total_distance = 0
-    current_stop = depot
-    for stop in route:
-        total_distance += round(instance.edge_weight[current_stop, stop])
-        current_stop = stop
-    return total_distance + round(instance.edge_weight[current_stop, depot])
+    stops = np.asarray(route, dtype=np.int64)
+    return int(_route_costs(stops, np.zeros(len(stops), dtype=np.int64), 1, instance)[0])
 
 
 def get_load(route: list, instance: Instance) -> int:
-    return sum(instance.demand[stop] for stop in route)
+    return int(np.asarray(instance.demand)[np.asarray(route, dtype=np.int64)].sum())
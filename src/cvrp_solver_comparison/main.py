@@ -1,14 +1,10 @@
-import vrplib
-
-from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.cache import load_instance, load_solution
 
 
 def main():
     # Read VRPLIB formatted instances (default)
-    instance = vrplib.read_instance("data/X/X-n101-k25.vrp")
-    solution = vrplib.read_solution("data/X/X-n101-k25.sol")
-    instance = Instance.model_validate(instance)
-    solution = Solution.model_validate(solution)
+    instance = load_instance("data/X/X-n101-k25.vrp")
+    solution = load_solution("data/X/X-n101-k25.sol")
     print(instance)
     print(solution)
 
@@ -0,0 +1,67 @@
+import time
+from abc import ABC, abstractmethod
+from typing import Any
+
+from cvrp_solver_comparison.domain.fleet import fleet_for
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.options import SolverOptions
+
+
+class SolverAdapter(ABC):
+    """
+    Base class of the solver adapters, which split a solve into prepare and solve.
+
+    prepare converts an instance into the model of the engine (e.g. the
+    pyvrp ProblemData, the vroom Input, the pragmatic JSON of vrp-cli), solve
+    runs the engine on it. Every call prepares again, the benchmark runs
+    every solve in a fresh process, in which a model would never be reused.
+
+    An adapter is called like the solver functions it replaces, see
+    solver.SolverFn. timings["build"] is the time spent in prepare plus
+    whatever solve had to build per call.
+    """
+
+    @abstractmethod
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> Any:
+        """Model of the engine for the instance, solve must not change it."""
+
+    @abstractmethod
+    def solve(
+        self,
+        prepared: Any,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        """Solves a prepared model, timings["build"] only holds what had to be built per call."""
+
+    def __call__(
+        self,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int | None = None,
+        initial: Solution | None = None,
+        options: SolverOptions = SolverOptions(),
+    ) -> Solution | None:
+        num_vehicles = fleet_for(instance, num_vehicles, initial)
+        tic = time.perf_counter()
+        prepared = self.prepare(instance, num_vehicles, options)
+        prepare_time = time.perf_counter() - tic
+        solution = self.solve(
+            prepared,
+            instance,
+            time_limit,
+            num_vehicles=num_vehicles,
+            initial=initial,
+            options=options,
+        )
+        if solution is not None:
+            build_time = solution.timings.get("build", 0.0)
+            solution.timings["build"] = prepare_time + build_time
+        return solution
@@ -0,0 +1,51 @@
+import time
+from typing import Callable
+
+from cvrp_solver_comparison.domain.construction import (
+    clarke_wright,
+    nearest_neighbour,
+    sweep,
+)
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+
+
+class ConstructionAdapter(SolverAdapter):
+    """
+    Solver running one of the construction heuristics of domain.construction.
+    They finish long before any time limit and ignore the fleet size (every
+    route they open is a vehicle), the initial solution and the options.
+    There is nothing to prepare, the neighbour lists they use are cached by
+    the instance itself.
+    """
+
+    def __init__(self, heuristic: Callable[[Instance], Solution]):
+        self.heuristic = heuristic
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> None:
+        return None
+
+    def solve(
+        self,
+        prepared: None,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution:
+        tic = time.perf_counter()
+        solution = self.heuristic(instance)
+        solve_time = time.perf_counter() - tic
+        solution.timings = {"solve": solve_time}
+        solution.trace = [(solve_time, solution.cost)]
+        return solution
+
+
+solve_with_savings = ConstructionAdapter(clarke_wright)
+solve_with_sweep = ConstructionAdapter(sweep)
+solve_with_nearest_neighbour = ConstructionAdapter(nearest_neighbour)
@@ -0,0 +1,121 @@
+import cProfile
+import os
+import resource
+import shutil
+import signal
+import subprocess
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Literal
+
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.options import SolverOptions
+
+
+Profiler = Literal["cprofile", "py-spy"]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in MB (ru_maxrss is in KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+@contextmanager
+def profiled(profiler: Profiler | None, path: Path) -> Iterator[None]:
+    """
+    Profiles the block with cProfile (stats written to path.prof, e.g. for
+    snakeviz) or py-spy (speedscope profile written to path.json).
+
+    cProfile only sees Python frames, the time spent inside the native
+    engines shows up as one call. py-spy samples this process from outside,
+    with native frames, but needs the py-spy executable and permission to
+    ptrace this process.
+    """
+    if profiler is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if profiler == "cprofile":
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path.with_suffix(".prof"))
+    elif profiler == "py-spy":
+        executable = shutil.which("py-spy")
+        if executable is None:
+            raise RuntimeError("Profiling with py-spy needs the py-spy executable.")
+        sampler = subprocess.Popen(
+            [
+                executable,
+                "record",
+                "--pid",
+                str(os.getpid()),
+                "--native",
+                "--format",
+                "speedscope",
+                "--output",
+                str(path.with_suffix(".json")),
+            ]
+        )
+        try:
+            yield
+        finally:
+            # py-spy writes its output when it is interrupted
+            sampler.send_signal(signal.SIGINT)
+            try:
+                sampler.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                sampler.kill()
+                sampler.wait()
+    else:
+        raise ValueError(f"Unknown profiler '{profiler}'. Available: cprofile, py-spy")
+
+
+def instrumented(
+    solver,
+    *,
+    method: str,
+    options: SolverOptions = SolverOptions(),
+    profiler: Profiler | None = None,
+    profile_dir: str | Path = "data/profiles",
+):
+    """
+    Wraps a solver function so that every call records, on top of the phases
+    the adapter times itself ("build", "solve", "extract"):
+
+    - timings["total"]: wall-clock seconds of the whole call
+    - timings["cpu"]: CPU seconds of this process during the call, summed over all threads
+    - peak_rss_mb: peak resident memory of the process so far
+
+    The peak is that of the whole process, which is a fresh one per run in
+    the sandbox. With a profiler, the call is profiled into
+    profile_dir/<instance>_<method>_<time limit>s_seed<seed>_<threads>t, so
+    runs that only differ in options.seed or options.threads do not
+    overwrite each other's profiles.
+
+    :param solver: Solver function to wrap
+    :param method: Name of the solver, used for the profile file names
+    :param options: Options the solver was created with, their seed and thread count are used for the profile file names
+    :param profiler: None, "cprofile" or "py-spy", see profiled
+    :param profile_dir: Directory the profiles are written to
+    """
+
+    def solve(instance: Instance, time_limit: int, **kwargs) -> Solution:
+        path = Path(profile_dir) / (
+            f"{instance.name}_{method}_{time_limit}s"
+            f"_seed{options.seed}_{options.num_threads()}t"
+        )
+        tic, cpu = time.perf_counter(), time.process_time()
+        with profiled(profiler, path):
+            solution = solver(instance, time_limit, **kwargs)
+        if solution is not None:
+            solution.timings["total"] = time.perf_counter() - tic
+            solution.timings["cpu"] = time.process_time() - cpu
+            solution.peak_rss_mb = peak_rss_mb()
+        return solution
+
+    return solve
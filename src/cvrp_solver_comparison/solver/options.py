@@ -0,0 +1,45 @@
+import os
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class SolverOptions(BaseModel):
+    """
+    Settings shared by all solvers, plus a few solver-specific ones.
+
+    Every adapter maps them to the native knobs of its engine and ignores
+    those it has no counterpart for:
+
+    - pyvrp: seed, num_neighbours as size of the granular neighbourhood (the search is single-threaded)
+    - ortools: ortools_metaheuristic, num_neighbours as the arcs the search may use (routing search is single-threaded and deterministic)
+    - vroom: threads as nb_threads, vroom_exploration_level (vroom is deterministic)
+    - timefold: threads as move thread count (needs Timefold Enterprise for more than 1), seed as random seed
+    - rustvrp: threads as a single thread pool of that size (there is no seed)
+    - pyhygese: seed, num_neighbours as nbGranular (HGS is single-threaded)
+
+    num_neighbours restricts the search to the arcs between every customer
+    and its nearest customers, see DistanceMatrix.neighbours, plus all arcs
+    to and from the depot. None keeps the default of each solver.
+    """
+
+    model_config = ConfigDict(frozen=True)
+
+    threads: int | None = Field(default=1, ge=1)  # None: all cores this process may run on
+    seed: int = 0
+    num_neighbours: int | None = Field(default=None, ge=1)
+    vroom_exploration_level: int = Field(default=5, ge=0, le=5)
+    ortools_metaheuristic: Literal[
+        "AUTOMATIC",
+        "GREEDY_DESCENT",
+        "GUIDED_LOCAL_SEARCH",
+        "SIMULATED_ANNEALING",
+        "TABU_SEARCH",
+        "GENERIC_TABU_SEARCH",
+    ] = "GUIDED_LOCAL_SEARCH"
+
+    def num_threads(self) -> int:
+        """threads, with None resolved to the number of cores in the affinity mask of this process."""
+        if self.threads is None:
+            return len(os.sched_getaffinity(0))
+        return self.threads
@@ -1,74 +1,310 @@
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 
+from cvrp_solver_comparison.domain.construction import clarke_wright
+from cvrp_solver_comparison.domain.fleet import fleet_size, initial_routes
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.trace import improvements
 
 
-def solve_with_ortools(instance: Instance, time_limit: int) -> Solution:
-    """
-    Code for solving the CVRP using google or tools. Code heavily inspired by this documentation of the tool:
-    https://developers.google.com/optimization/routing/cvrp
+def build_routing_model(
+    instance: Instance,
+    *,
+    num_vehicles: int | None = None,
+    transit: str = "matrix",
+    distances: list[list[int]] | None = None,
+) -> tuple[pywrapcp.RoutingIndexManager, pywrapcp.RoutingModel]:
     """
+    Builds the routing model of an instance.
 
+    With transit="matrix", arc costs and demands are registered as a
+    pre-rounded int matrix and vector, which OR-Tools evaluates natively.
+    transit="callback" registers Python closures instead, which OR-Tools calls
+    through the interpreter on every arc evaluation; it is only kept to
+    compare both, see scripts/benchmark_ortools_transit.py.
+    The fleet defaults to fleet_size(instance) vehicles. distances is the
+    rounded matrix as nested lists, if it was converted before.
+    """
+    if num_vehicles is None:
+        num_vehicles = fleet_size(instance)
+    if distances is None:
+        distances = instance.distances.rounded().tolist()
     # create routing index manager
-    manager = pywrapcp.RoutingIndexManager(
-        len(instance.edge_weight), len(instance.demand), 0
-    )
+    manager = pywrapcp.RoutingIndexManager(len(distances), num_vehicles, 0)
     # create routing model
     routing = pywrapcp.RoutingModel(manager)
 
-    # Create and register a transit callback.
-    def distance_callback(from_index, to_index):
-        """Returns the distance between the two nodes."""
-        # Convert from routing variable Index to distance matrix NodeIndex.
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return round(instance.edge_weight[from_node][to_node])
+    if transit == "matrix":
+        transit_callback_index = routing.RegisterTransitMatrix(distances)
+        demand_callback_index = routing.RegisterUnaryTransitVector(
+            [int(demand) for demand in instance.demand]
+        )
+    elif transit == "callback":
+
+        def distance_callback(from_index, to_index):
+            """Returns the distance between the two nodes."""
+            # Convert from routing variable Index to distance matrix NodeIndex.
+            from_node = manager.IndexToNode(from_index)
+            to_node = manager.IndexToNode(to_index)
+            return distances[from_node][to_node]
+
+        def demand_callback(from_index):
+            """Returns the demand of the node."""
+            # Convert from routing variable Index to demands NodeIndex.
+            from_node = manager.IndexToNode(from_index)
+            return int(instance.demand[from_node])
+
+        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+        demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
+    else:
+        raise ValueError(f"Unknown transit '{transit}'. Available: matrix, callback")
 
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
     # Define cost of each arc.
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
     # Add Capacity constraint.
-    def demand_callback(from_index):
-        """Returns the demand of the node."""
-        # Convert from routing variable Index to demands NodeIndex.
-        from_node = manager.IndexToNode(from_index)
-        return instance.demand[from_node]
-
-    demand_callback_index = routing.RegisterUnaryTransitCallback(demand_callback)
     routing.AddDimensionWithVehicleCapacity(
         demand_callback_index,
         0,  # null capacity slack
-        [instance.capacity for _ in instance.demand],  # vehicle maximum capacities
+        [instance.capacity] * num_vehicles,  # vehicle maximum capacities
         True,  # start cumul to zero
         "Capacity",
     )
+    return manager, routing
 
-    # Setting first solution heuristic.
+
+def restrict_to_neighbours(
+    manager: pywrapcp.RoutingIndexManager,
+    routing: pywrapcp.RoutingModel,
+    neighbours: np.ndarray,
+    routes: list[list[int]] = (),
+) -> None:
+    """
+    Restricts the successors of every customer to its candidate arcs.
+
+    A customer may be followed by its neighbours, the customers it is a
+    neighbour of, the end of any route and its successor in routes (e.g.
+    the savings routes or an initial solution, which have to stay
+    feasible). Arcs out of the depot are left alone. This shrinks the
+    domain of every NextVar from n to O(k) values, so the search never
+    looks at the other arcs.
+    """
+    candidates = [set(row) for row in neighbours.tolist()]
+    # the depot row is skipped, the ends of the routes stand in for the depot
+    for node, row in enumerate(neighbours.tolist()[1:], start=1):
+        for neighbour in row:
+            candidates[neighbour].add(node)
+    for route in routes:
+        for node, following in zip(route, route[1:]):
+            candidates[node].add(following)
+    ends = [routing.End(vehicle) for vehicle in range(routing.vehicles())]
+    for node in range(1, len(candidates)):
+        routing.NextVar(manager.NodeToIndex(node)).SetValues(
+            [manager.NodeToIndex(following) for following in candidates[node]] + ends
+        )
+
+
+def search_parameters(time_limit: int, metaheuristic: str = "GUIDED_LOCAL_SEARCH"):
     search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    # Setting first solution heuristic.
     search_parameters.first_solution_strategy = (
         routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
     )
-    search_parameters.local_search_metaheuristic = (
-        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    search_parameters.local_search_metaheuristic = getattr(
+        routing_enums_pb2.LocalSearchMetaheuristic, metaheuristic
     )
     search_parameters.time_limit.FromSeconds(time_limit)
+    return search_parameters
+
+
+@dataclass
+class RoutingModel:
+    """
+    A routing model that is solved any number of times.
+
+    OR-Tools closes a model on its first solve, later solves only change
+    the search parameters. The solution callback is registered once and
+    appends (seconds since start, cost) to points, which solve resets.
+    start_routes are the routes the search starts from when the call
+    brings no initial solution, none for the first solution strategy.
+    """
+
+    manager: pywrapcp.RoutingIndexManager
+    routing: pywrapcp.RoutingModel
+    start_routes: list[list[int]] = field(default_factory=list)
+    points: list[tuple[float, int]] = field(default_factory=list)
+    start: float = 0.0
+
+    def __post_init__(self):
+        self.routing.AddAtSolutionCallback(self._record)
+
+    def _record(self) -> None:
+        self.points.append(
+            (time.perf_counter() - self.start, self.routing.CostVar().Max())
+        )
+
+    def solve(
+        self,
+        parameters,
+        routes: list[list[int]] = (),
+        *,
+        start: float | None = None,
+    ) -> pywrapcp.Assignment | None:
+        """
+        Solves the model from routes, or from the first solution strategy
+        without routes (or if the model rejects them).
+
+        :param parameters: Search parameters, see search_parameters
+        :param routes: Routes to start from, as lists of nodes
+        :param start: perf_counter the times of points are relative to, defaults to now
+        :return: The best assignment, None if the search found no solution
+        """
+        self.routing.CloseModelWithParameters(parameters)
+        # RoutesToAssignment into a fresh assignment, ReadAssignmentFromRoutes
+        # reuses one of the model and fails on every other solve
+        assignment = None
+        if routes:
+            assignment = self.routing.solver().Assignment()
+            if not self.routing.RoutesToAssignment(
+                [
+                    [self.manager.NodeToIndex(stop) for stop in route]
+                    for route in routes
+                ],
+                True,
+                True,
+                assignment,
+            ):
+                print("OR-Tools rejected the initial solution, solving from scratch.")
+                assignment = None
+        self.points = []
+        self.start = time.perf_counter() if start is None else start
+        if assignment is None:
+            return self.routing.SolveWithParameters(parameters)
+        return self.routing.SolveFromAssignmentWithParameters(assignment, parameters)
+
+
+class OrToolsAdapter(SolverAdapter):
+    """
+    Code for solving the CVRP using google or tools. Code heavily inspired by this documentation of the tool:
+    https://developers.google.com/optimization/routing/cvrp
+
+    Of the options only ortools_metaheuristic applies, the routing search
+    has neither a thread count nor a seed. An initial solution replaces the
+    first solution strategy, the search starts from its routes.
+
+    options.num_neighbours restricts the arcs out of every customer with
+    restrict_to_neighbours. The cheapest arc heuristic often finds no first
+    solution on these arcs, so the arcs of the Clarke-Wright savings routes
+    are candidates too and the search starts from these routes, if they fit
+    into the fleet. If the restricted search still finds no solution, the
+    unrestricted model is solved in the rest of the time limit.
+
+    The prepared model is the RoutingModel. With an initial solution on a
+    restricted model, whose arcs have to be candidates, the model is built
+    with these arcs instead.
+    """
+
+    def __init__(self, *, transit: str = "matrix"):
+        self.transit = transit
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> RoutingModel:
+        return self.build(instance, num_vehicles, options.num_neighbours)
+
+    def build(
+        self,
+        instance: Instance,
+        num_vehicles: int,
+        num_neighbours: int | None,
+        routes: list[list[int]] = (),
+    ) -> RoutingModel:
+        """RoutingModel of an instance, restricted to num_neighbours and the arcs of routes if num_neighbours is set."""
+        manager, routing = build_routing_model(
+            instance, num_vehicles=num_vehicles, transit=self.transit
+        )
+        if num_neighbours is None:
+            return RoutingModel(manager, routing)
+        savings = initial_routes(clarke_wright(instance))
+        restrict_to_neighbours(
+            manager,
+            routing,
+            instance.neighbours(num_neighbours),
+            savings + list(routes),
+        )
+        start_routes = savings if len(savings) <= num_vehicles else []
+        return RoutingModel(manager, routing, start_routes)
+
+    def solve(
+        self,
+        prepared: RoutingModel,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        tic = time.perf_counter()
+        model = prepared
+        routes = model.start_routes
+        if initial is not None:
+            routes = initial_routes(initial)
+            if options.num_neighbours is not None:
+                model = self.build(
+                    instance, num_vehicles, options.num_neighbours, routes
+                )
+        build_time = time.perf_counter() - tic
+
+        # Solve the problem. The callback of the model records the cost of every
+        # solution the search finds, guided local search also accepts worse ones,
+        # so only the improvements end up in the trace.
+        tic = time.perf_counter()
+        parameters = search_parameters(time_limit, options.ortools_metaheuristic)
+        solution = model.solve(parameters, routes)
+        if solution is None and options.num_neighbours is not None:
+            print(
+                "OR-Tools found no solution on the candidate arcs, solving without them."
+            )
+            model = self.build(instance, num_vehicles, None)
+            remaining = max(1, math.ceil(time_limit - (time.perf_counter() - tic)))
+            parameters = search_parameters(remaining, options.ortools_metaheuristic)
+            solution = model.solve(parameters, initial_routes(initial), start=tic)
+        solve_time = time.perf_counter() - tic
+        if solution is None:
+            return None
+        tic = time.perf_counter()
+        manager, routing = model.manager, model.routing
+        routes = []
+        for vehicle_id in range(routing.vehicles()):
+            if not routing.IsVehicleUsed(solution, vehicle_id):
+                continue
+            route = []
+            index = routing.Start(vehicle_id)
+            while not routing.IsEnd(index):
+                node_index = manager.IndexToNode(index)
+                if node_index != 0:
+                    route.append(node_index)
+                index = solution.Value(routing.NextVar(index))
+            routes.append(route)
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            cost=solution.ObjectiveValue(),
+            routes=routes,
+            timings={
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=improvements(model.points),
+        )
+
 
-    # Solve the problem.
-    solution = routing.SolveWithParameters(search_parameters)
-    if solution is None:
-        return None
-    routes = []
-    for vehicle_id in range(len(instance.demand)):
-        if not routing.IsVehicleUsed(solution, vehicle_id):
-            continue
-        route = []
-        index = routing.Start(vehicle_id)
-        while not routing.IsEnd(index):
-            node_index = manager.IndexToNode(index)
-            if node_index != 0:
-                route.append(node_index)
-            index = solution.Value(routing.NextVar(index))
-        routes.append(route)
-    return Solution(cost=solution.ObjectiveValue(), routes=routes)
+solve_with_ortools = OrToolsAdapter()
@@ -1,22 +1,86 @@
+import re
+import time
+
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.trace import capture_stdout, improvements
 import hygese as hgs
 
 
-def solve_with_pyhygese(instance: Instance, time_limit: int) -> Solution:
-    # Simple pyhygese baseline would go here
+# state line that HGS logs every 500 iterations, e.g.
+# "It    500    218 | T(s) 1.05 | Feas 52 17946.00 18060.32 | Inf 30 ..."
+_STATE_LINE = re.compile(r"T\(s\) ([\d.]+) \| Feas \d+ ([\d.]+)")
+
+
+class PyHygeseAdapter(SolverAdapter):
+    """
+    Solves the CVRP with HGS through pyhygese. The prepared model is the
+    data dict HGS reads, which it leaves unchanged. HGS cannot start from an
+    initial solution, so initial is ignored.
+    """
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> dict:
+        data = dict()
+        data["distance_matrix"] = instance.distances.rounded()
+        data["num_vehicles"] = num_vehicles
+        data["depot"] = instance.depot[0]
+        data["demands"] = instance.demand
+        data["vehicle_capacity"] = instance.capacity
+        data["service_times"] = [0 for _ in instance.demand]
+        return data
+
+    def solve(
+        self,
+        prepared: dict,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        # Solver initialization
+        tic = time.perf_counter()
+        granular = {}
+        if options.num_neighbours is not None:
+            granular["nbGranular"] = options.num_neighbours
+        ap = hgs.AlgorithmParameters(
+            timeLimit=time_limit, seed=options.seed, **granular
+        )  # seconds
+        hgs_solver = hgs.Solver(parameters=ap, verbose=True)
+        build_time = time.perf_counter() - tic
 
-    data = dict()
-    data["distance_matrix"] = instance.edge_weight.round()
-    data["num_vehicles"] = len(instance.demand) - 1
-    data["depot"] = instance.depot[0]
-    data["demands"] = instance.demand
-    data["vehicle_capacity"] = instance.capacity
-    data["service_times"] = [0 for _ in instance.demand]
+        # Solve, the trace is parsed from the log HGS writes to stdout. The log
+        # is sparse, so the final cost is added at the end of the solve if it
+        # improved after the last logged state.
+        tic = time.perf_counter()
+        with capture_stdout() as output:
+            result = hgs_solver.solve_cvrp(prepared)
+        solve_time = time.perf_counter() - tic
+        # without a feasible solution HGS returns no (or too few) routes and a cost of 0
+        if sum(map(len, result.routes)) != instance.dimension - 1:
+            return None
+        tic = time.perf_counter()
+        points = [
+            (float(seconds), float(cost))
+            for seconds, cost in _STATE_LINE.findall("".join(output))
+        ]
+        points.append((solve_time, result.cost))
+        trace = improvements(points)
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            routes=result.routes,
+            cost=result.cost,
+            timings={
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=trace,
+        )
 
-    # Solver initialization
-    ap = hgs.AlgorithmParameters(timeLimit=time_limit)  # seconds
-    hgs_solver = hgs.Solver(parameters=ap, verbose=True)
 
-    # Solve
-    result = hgs_solver.solve_cvrp(data)
-    return Solution(routes=result.routes, cost=result.cost)
+solve_with_pyhygese = PyHygeseAdapter()
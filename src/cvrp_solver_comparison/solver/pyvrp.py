@@ -1,29 +1,105 @@
+import time
+from itertools import accumulate
+
+from cvrp_solver_comparison.domain.fleet import initial_routes
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.trace import improvements
 import pyvrp
+from pyvrp.search import NeighbourhoodParams
 
 
-def solve_with_pyvrp(instance: Instance, time_limit: int) -> Solution:
+class PyVRPAdapter(SolverAdapter):
     """
     Code for solving the CVRP using pyvrp. Code heavily inspired by this documentation of the tool:
     https://pyvrp.org/examples/quick_tutorial.html
 
+    The prepared model is the ProblemData, built directly from the rounded
+    distance matrix instead of adding every edge to a pyvrp.Model one by
+    one. An initial solution is the warm start of the iterated local
+    search. options.num_neighbours sets the size of the granular
+    neighbourhood.
     """
-    # 1 transform instance object for pyvrp inputs
-    m = pyvrp.Model()
-    m.add_vehicle_type(num_available=len(instance.demand), capacity=instance.capacity)
-    depot_coords = instance.node_coord[instance.depot[0]]
-    m.add_depot(x=depot_coords[0], y=depot_coords[1])
-    _ = [
-        m.add_client(float(coord[0]), float(coord[1]), delivery=int(demand))
-        for coord, demand in list(zip(instance.node_coord, instance.demand))[1:]
-    ]
-    for i, frm in enumerate(m.locations):
-        for j, to in enumerate(m.locations):
-            m.add_edge(frm, to, round(instance.edge_weight[i][j]))
-
-    # 2 solve by pyvrp
-    res = m.solve(stop=pyvrp.stop.MaxRuntime(time_limit), display=True)  # one second
-    # 3 transform pyvrp output to solution object
-    return Solution(
-        routes=[list(route) for route in res.best.routes()], cost=res.cost()
-    )
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> pyvrp.ProblemData:
+        depot_coords = instance.node_coord[instance.depot[0]]
+        depot = pyvrp.Depot(x=depot_coords[0], y=depot_coords[1])
+        clients = [
+            pyvrp.Client(x=coord[0], y=coord[1], delivery=[int(demand)])
+            for coord, demand in list(zip(instance.node_coord, instance.demand))[1:]
+        ]
+        vehicle_type = pyvrp.VehicleType(
+            num_available=num_vehicles, capacity=[instance.capacity]
+        )
+        # durations are never used, so the distance matrix serves as both
+        distances = instance.distances.rounded()
+        return pyvrp.ProblemData(
+            clients=clients,
+            depots=[depot],
+            vehicle_types=[vehicle_type],
+            distance_matrices=[distances],
+            duration_matrices=[distances],
+        )
+
+    def solve(
+        self,
+        prepared: pyvrp.ProblemData,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        # 1 the parts of the input that depend on the call
+        tic = time.perf_counter()
+        params = pyvrp.SolveParams()
+        if options.num_neighbours is not None:
+            params = pyvrp.SolveParams(
+                neighbourhood=NeighbourhoodParams(num_neighbours=options.num_neighbours)
+            )
+        start = None
+        if initial is not None:
+            start = pyvrp.Solution(prepared, initial_routes(initial))
+        build_time = time.perf_counter() - tic
+
+        # 2 solve by pyvrp
+        tic = time.perf_counter()
+        res = pyvrp.solve(
+            prepared,
+            stop=pyvrp.stop.MaxRuntime(time_limit),
+            seed=options.seed,
+            display=True,
+            params=params,
+            initial_solution=start,
+        )
+        solve_time = time.perf_counter() - tic
+        if not res.is_feasible():
+            return None
+        # 3 transform pyvrp output to solution object, the trace comes from the
+        # per-iteration statistics (runtime and cost of the best solution, as
+        # long as that one is feasible, its penalised cost is its distance)
+        tic = time.perf_counter()
+        routes = [list(route) for route in res.best.routes()]
+        trace = improvements(
+            (elapsed, datum.best_cost)
+            for elapsed, datum in zip(accumulate(res.stats.runtimes), res.stats.data)
+            if datum.best_feas
+        )
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            routes=routes,
+            cost=res.cost(),
+            timings={
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=trace,
+        )
+
+
+solve_with_pyvrp = PyVRPAdapter()
@@ -10,6 +10,7 @@ from typing import Optional
 @dataclass
 class Telemetry:
     progress: Progress
+    metrics: Optional[Metrics] = None
 
 
 @dataclass
@@ -20,11 +21,18 @@ class Progress:
     dumpPopulation: bool
 
 
+@dataclass
+class Metrics:
+    enabled: bool
+    trackPopulation: int
+
+
 def _default_telemetry() -> Telemetry:
     return Telemetry(
         progress=Progress(
             enabled=True, logBest=100, logPopulation=1000, dumpPopulation=False
-        )
+        ),
+        metrics=Metrics(enabled=True, trackPopulation=100),
     )
 
 
@@ -50,9 +58,16 @@ def _default_logging() -> Logging:
     return Logging(enabled=True)
 
 
+@dataclass
+class Parallelism:
+    numThreadPools: int
+    threadsPerPool: int
+
+
 @dataclass
 class Environment:
     logging: Logging = field(default_factory=_default_logging)
+    parallelism: Optional[Parallelism] = None
     isExperimental: Optional[bool] = None
 
 
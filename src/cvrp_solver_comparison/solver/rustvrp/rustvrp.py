@@ -1,93 +1,167 @@
-from cvrp_solver_comparison.domain.models import Instance, Solution
+import time
 
+import numpy as np
+import orjson
 import vrp_cli
-from cvrp_solver_comparison.solver.rustvrp import pragmatic_types as prg
-from cvrp_solver_comparison.solver.rustvrp import config_types as cfg
-import json
 from pydantic import TypeAdapter
 
+from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.trace import improvements
+from cvrp_solver_comparison.solver.rustvrp import config_types as cfg
+
 
-def solve_with_rustvrp(instance: Instance, time_limit: int) -> Solution:
+def build_problem(instance: Instance, num_vehicles: int) -> dict:
     """
-    Code for solving the CVRP using rustvrp. Code heavily inspired by this documentation of the tool:
-    https://github.com/reinterpretcat/vrp/tree/master/examples/python-interop
+    Pragmatic problem of an instance as plain dicts, following the layout of
+    pragmatic_types.Problem, so that it can be dumped without validating it.
     """
-    # if you want to use approximation, you can skip this definition and pass empty list later
-    # also there is a get_locations method to get list of locations in expected order.
-    # you can use this list to fetch routing matrix externally
-    matrix = prg.RoutingMatrix(
-        profile="normal_car",
-        durations=list(instance.edge_weight.flatten().round()),
-        distances=list(instance.edge_weight.flatten().round()),
-    )
-
-    # specify termination criteria: max running time in seconds or max amount of refinement generations
-    config = cfg.Config(termination=cfg.Termination(maxTime=time_limit))
-
-    # specify test problem
-    problem = prg.Problem(
-        plan=prg.Plan(
-            jobs=[
-                prg.Job(
-                    id=str(i),
-                    deliveries=[
-                        prg.JobTask(
-                            places=[
-                                prg.JobPlace(
-                                    location=prg.Location(index=i),
-                                    duration=0,
-                                ),
-                            ],
-                            demand=[demand],
-                        )
+    return {
+        "plan": {
+            "jobs": [
+                {
+                    "id": str(i),
+                    "deliveries": [
+                        {
+                            "places": [{"location": {"index": i}, "duration": 0}],
+                            "demand": [int(demand)],
+                        }
                     ],
-                )
+                }
                 for i, demand in enumerate(instance.demand)
             ]
-        ),
-        fleet=prg.Fleet(
-            vehicles=[
-                prg.VehicleType(
-                    typeId="vehicle",
-                    vehicleIds=[f"vehicle_{i}" for i, _ in enumerate(instance.demand)],
-                    profile=prg.VehicleProfile(matrix="normal_car"),
-                    costs=prg.VehicleCosts(fixed=0, distance=1, time=0),
-                    shifts=[
-                        prg.VehicleShift(
-                            start=prg.VehicleShiftStart(
-                                earliest="2000-01-01T00:00:00Z",
-                                location=prg.Location(index=0),
-                            ),
-                            end=prg.VehicleShiftEnd(
-                                latest="2100-01-01T00:00:00Z",
-                                location=prg.Location(index=0),
-                            ),
-                        )
+        },
+        "fleet": {
+            "vehicles": [
+                {
+                    "typeId": "vehicle",
+                    "vehicleIds": [f"vehicle_{i}" for i in range(num_vehicles)],
+                    "profile": {"matrix": "normal_car"},
+                    "costs": {"fixed": 0, "distance": 1, "time": 0},
+                    "shifts": [
+                        {
+                            "start": {
+                                "earliest": "2000-01-01T00:00:00Z",
+                                "location": {"index": 0},
+                            },
+                            "end": {
+                                "latest": "2100-01-01T00:00:00Z",
+                                "location": {"index": 0},
+                            },
+                        }
                     ],
-                    capacity=[instance.capacity],
-                )
+                    "capacity": [instance.capacity],
+                }
             ],
-            profiles=[prg.RoutingProfile(name="normal_car")],
-        ),
+            "profiles": [{"name": "normal_car"}],
+        },
+    }
+
+
+def build_matrix(instance: Instance) -> bytes:
+    """Routing matrix as JSON, with the int32 distances written by orjson straight from the array."""
+    distances = np.asarray(instance.distances.rounded()).ravel()
+    return orjson.dumps(
+        {"profile": "normal_car", "durations": distances, "distances": distances},
+        option=orjson.OPT_SERIALIZE_NUMPY,
     )
 
-    # run solver and deserialize result into solution model
-    solution = prg.Solution(
-        **json.loads(
-            vrp_cli.solve_pragmatic(
-                problem=TypeAdapter(prg.Problem).dump_json(problem).decode(),
-                matrices=[TypeAdapter(prg.RoutingMatrix).dump_json(matrix).decode()],
-                config=TypeAdapter(cfg.Config).dump_json(config).decode(),
-            )
+
+def evolution_trace(solution: dict) -> list[tuple[float, int]]:
+    """
+    Trace of the best cost from the evolution metrics of a pragmatic solution.
+
+    The metrics hold the population every trackPopulation generations, best
+    individual first. Its fitness is [unassigned jobs, tours, cost], so only
+    individuals without unassigned jobs are feasible.
+    """
+    evolution = solution.get("extras", {}).get("metrics", {}).get("evolution", [])
+    points = []
+    for generation in evolution:
+        individuals = generation["population"]["individuals"]
+        if individuals and individuals[0]["fitness"][0] == 0:
+            points.append((generation["timestamp"], individuals[0]["fitness"][-1]))
+    return improvements(points)
+
+
+class RustVRPAdapter(SolverAdapter):
+    """
+    Code for solving the CVRP using rustvrp. Code heavily inspired by this documentation of the tool:
+    https://github.com/reinterpretcat/vrp/tree/master/examples/python-interop
+
+    The prepared model is the serialized pragmatic problem and routing
+    matrix. The solver runs in a single thread pool with options.threads
+    threads, instead of its default of one thread per core of the machine.
+    The python interop of vrp-cli takes no initial solution, so initial is
+    ignored.
+    """
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> tuple[str, str]:
+        # if you want to use approximation, you can skip the matrix and pass empty list later
+        # also there is a get_locations method to get list of locations in expected order.
+        # you can use this list to fetch routing matrix externally
+        problem = orjson.dumps(build_problem(instance, num_vehicles))
+        return problem.decode(), build_matrix(instance).decode()
+
+    def solve(
+        self,
+        prepared: tuple[str, str],
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        problem, matrix = prepared
+        # specify termination criteria: max running time in seconds or max amount of refinement generations
+        tic = time.perf_counter()
+        config = cfg.Config(
+            termination=cfg.Termination(maxTime=time_limit),
+            environment=cfg.Environment(
+                parallelism=cfg.Parallelism(
+                    numThreadPools=1, threadsPerPool=options.num_threads()
+                )
+            ),
         )
-    )
-    cost = solution.statistic.cost
-    routes = []
-    for tour in solution.tours:
-        route = []
-        for stop in tour.stops:
-            idx = stop.location.index
-            if idx != 0:
-                route.append(idx)
-        routes.append(route)
-    return Solution(routes=routes, cost=cost)
+        config = TypeAdapter(cfg.Config).dump_json(config).decode()
+        build_time = time.perf_counter() - tic
+
+        # run solver, then deserialize result
+        tic = time.perf_counter()
+        output = vrp_cli.solve_pragmatic(
+            problem=problem, matrices=[matrix], config=config
+        )
+        solve_time = time.perf_counter() - tic
+
+        tic = time.perf_counter()
+        solution = orjson.loads(output)
+        if solution.get("unassigned"):
+            return None
+        cost = solution["statistic"]["cost"]
+        routes = [
+            [
+                stop["location"]["index"]
+                for stop in tour["stops"]
+                if stop["location"]["index"] != 0
+            ]
+            for tour in solution["tours"]
+        ]
+        trace = evolution_trace(solution)
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            routes=routes,
+            cost=cost,
+            timings={
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=trace,
+        )
+
+
+solve_with_rustvrp = RustVRPAdapter()
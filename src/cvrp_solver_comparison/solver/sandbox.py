@@ -0,0 +1,228 @@
+import multiprocessing
+import os
+import resource
+import time
+import traceback
+from enum import Enum
+from pathlib import Path
+
+from pydantic import BaseModel, ConfigDict
+
+from cvrp_solver_comparison.domain.fleet import FLEET_ATTEMPTS
+from cvrp_solver_comparison.domain.cache import load_instance
+from cvrp_solver_comparison.domain.models import Solution
+from cvrp_solver_comparison.solver.instrument import Profiler
+from cvrp_solver_comparison.solver.options import SolverOptions
+
+
+class RunStatus(str, Enum):
+    OK = "ok"
+    TIMEOUT = "timeout"
+    OOM = "oom"
+    CRASHED = "crashed"
+
+
+class SandboxResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+    status: RunStatus
+    solution: Solution | None = None
+    solve_time: float | None = None  # seconds spent inside the solver function
+    startup_time: float | None = None  # seconds spent importing and creating the solver
+    peak_rss_mb: float | None = None
+    message: str = ""
+
+
+def _rss_mb(pid: int, field: str = "VmRSS") -> float | None:
+    """Current resident set size (or another field, e.g. VmSize) of a process in MB, read from /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) / 1024
+    except (FileNotFoundError, ProcessLookupError):
+        return None
+    return None
+
+
+def _run_child(
+    conn,
+    method: str,
+    instance_path: str,
+    cache_dir: str | None,
+    time_limit: int,
+    options: SolverOptions | None,
+    initial: Solution | None,
+    profiler: Profiler | None,
+    address_space_limit_mb: float | None,
+) -> None:
+    # imported here, so that importing the solvers (and starting the JVM) is
+    # not counted against the wall-clock limit of the solve itself, it is
+    # reported as the startup time instead
+    tic = time.perf_counter()
+    from cvrp_solver_comparison.solver.solver import create_solver
+
+    try:
+        solver = create_solver(
+            method=method,
+            fleet_growth=True,
+            options=options,
+            profiler=profiler,
+        )
+        startup_time = time.perf_counter() - tic
+        # memory-mapped from the cache, so the arrays are shared with other
+        # processes instead of being copied into this one
+        instance = load_instance(instance_path, cache_dir=cache_dir, mmap=True)
+        if address_space_limit_mb is not None:
+            # allocations beyond the limit fail in the child (MemoryError in
+            # Python, std::bad_alloc in native code) instead of swapping
+            loaded = _rss_mb(os.getpid(), "VmSize")
+            limit = int((loaded + address_space_limit_mb) * 1024 * 1024)
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        conn.send(("started", startup_time))
+        tic = time.time()
+        solution = solver(instance, time_limit, initial=initial)
+        toc = time.time()
+        conn.send((RunStatus.OK, (solution, toc - tic)))
+    except MemoryError:
+        conn.send((RunStatus.OOM, traceback.format_exc()))
+    except Exception:
+        conn.send((RunStatus.CRASHED, traceback.format_exc()))
+    finally:
+        conn.close()
+
+
+def run_sandboxed(
+    method: str,
+    instance_path: str | Path,
+    time_limit: int,
+    *,
+    cache_dir: str | Path | None = None,
+    options: SolverOptions | None = None,
+    initial: Solution | None = None,
+    profiler: Profiler | None = None,
+    wall_clock_limit: float | None = None,
+    memory_limit_mb: float | None = None,
+    address_space_limit_mb: float | None = None,
+    startup_limit: float = 300,
+    poll_interval: float = 0.1,
+) -> SandboxResult:
+    """
+    Runs the solver returned by create_solver(method) in a child process.
+
+    The child loads the instance itself through the instance cache, with
+    memory-mapped arrays, so the instance is neither pickled into it nor
+    copied into its resident memory.
+
+    A segfault of the solver (e.g. inside the JVM behind timefold) only takes
+    down the child. The child is killed once its solve exceeds the wall-clock
+    limit or its resident memory exceeds the memory limit, which is polled.
+    The address space limit is enforced by the kernel (RLIMIT_AS), so it
+    also stops allocations between two polls. It bounds the virtual memory
+    the solve may map on top of the loaded solvers, e.g. the about 4 GB the
+    JVM behind timefold reserves on startup are not counted, but the heap
+    of the JVM is only bounded by the memory limit. Every run pays the
+    startup of its solver (imports, the JVM and the Timefold warm-up), which
+    is measured separately from the solve and reported as startup_time. The
+    solver is
+    rerun with a larger fleet if it finds no feasible solution (see
+    solver.with_fleet_growth), up to FLEET_ATTEMPTS times, each with the
+    full time limit.
+
+    :param method: Solver name as accepted by create_solver
+    :param instance_path: Path of the .vrp file of the instance to solve
+    :param time_limit: Time limit handed to the solver in seconds
+    :param cache_dir: Cache directory of load_instance
+    :param options: Options handed to create_solver
+    :param initial: Initial solution handed to the solver
+    :param profiler: Profiler handed to create_solver, the profile is written by the child
+    :param wall_clock_limit: Hard limit for the solve in seconds, defaults to FLEET_ATTEMPTS * 1.5 * time_limit + 10, math.inf for none
+    :param memory_limit_mb: Hard limit for the resident memory of the child, None for no limit
+    :param address_space_limit_mb: Hard limit for the virtual memory the solve may map, None for no limit
+    :param startup_limit: Hard limit in seconds for importing and building the solver in the child
+    :param poll_interval: Seconds between two checks of the child
+    :return: Status, solution (if any), startup and solve time and peak memory of the run
+    """
+    if wall_clock_limit is None:
+        wall_clock_limit = FLEET_ATTEMPTS * 1.5 * time_limit + 10
+
+    context = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_run_child,
+        args=(
+            child_conn,
+            method,
+            str(instance_path),
+            None if cache_dir is None else str(cache_dir),
+            time_limit,
+            options,
+            initial,
+            profiler,
+            address_space_limit_mb,
+        ),
+    )
+    process.start()
+    child_conn.close()
+
+    peak_rss_mb = None
+    startup_time = None
+    deadline = time.time() + startup_limit
+    status, payload = None, None
+    reported = False  # whether the child reported the status itself
+    while status is None:
+        if parent_conn.poll(poll_interval):
+            try:
+                message, payload = parent_conn.recv()
+            except EOFError:
+                break
+            if message == "started":
+                startup_time = payload
+                deadline = time.time() + wall_clock_limit
+            else:
+                status, reported = message, True
+            continue
+        if not process.is_alive():
+            break
+        rss = _rss_mb(process.pid)
+        if rss is not None:
+            peak_rss_mb = rss if peak_rss_mb is None else max(peak_rss_mb, rss)
+        if memory_limit_mb is not None and rss is not None and rss > memory_limit_mb:
+            status = RunStatus.OOM
+            payload = f"Resident memory {rss:.0f} MB exceeded the limit of {memory_limit_mb} MB."
+        elif time.time() > deadline:
+            status = RunStatus.TIMEOUT
+            payload = f"Run exceeded the wall-clock limit of {wall_clock_limit} s."
+
+    if reported or status is None:
+        # give the child (and a JVM inside it) some time to shut down on its own
+        process.join(timeout=10)
+    killed = process.is_alive()
+    if killed:
+        process.kill()
+    process.join()
+    parent_conn.close()
+
+    if status is None:
+        # the child died without reporting back, e.g. a segfault or the kernel OOM killer
+        status = (
+            RunStatus.OOM
+            if process.exitcode == -9 and not killed
+            else RunStatus.CRASHED
+        )
+        payload = f"Solver process exited with code {process.exitcode}."
+
+    if status == RunStatus.OK:
+        solution, solve_time = payload
+        return SandboxResult(
+            status=status,
+            solution=solution,
+            solve_time=solve_time,
+            startup_time=startup_time,
+            peak_rss_mb=peak_rss_mb,
+        )
+    return SandboxResult(
+        status=status,
+        startup_time=startup_time,
+        peak_rss_mb=peak_rss_mb,
+        message=payload,
+    )
@@ -1,30 +1,104 @@
-from typing import Callable
+import time
+from functools import partial
+from pathlib import Path
+from typing import Protocol
+
+from cvrp_solver_comparison.domain.fleet import FLEET_ATTEMPTS, fleet_size, grow_fleet
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.utils import check_solution
+from cvrp_solver_comparison.solver.construction import (
+    solve_with_nearest_neighbour,
+    solve_with_savings,
+    solve_with_sweep,
+)
+from cvrp_solver_comparison.solver.instrument import Profiler, instrumented
+from cvrp_solver_comparison.solver.options import SolverOptions
 from cvrp_solver_comparison.solver.ortools import solve_with_ortools
 from cvrp_solver_comparison.solver.pyhygese import solve_with_pyhygese
 from cvrp_solver_comparison.solver.pyvrp import solve_with_pyvrp
 from cvrp_solver_comparison.solver.rustvrp.rustvrp import solve_with_rustvrp
 from cvrp_solver_comparison.solver.timefold_solver.timefold_solver import (
     solve_with_timefold,
+    warm_up as warm_up_timefold,
 )
 from cvrp_solver_comparison.solver.vroom import solve_with_vroom
 
 
-# Type alias for solver functions
-SolverFn = Callable[[Instance, int], Solution]
+class SolverFn(Protocol):
+    """
+    Signature of solver functions. An initial solution is a warm start for the
+    solvers that support one (pyvrp, ortools, vroom, timefold) and ignored by
+    the others. All solvers below are SolverAdapter instances, see
+    solver.adapter.
+    """
+
+    def __call__(
+        self, instance: Instance, time_limit: int, *, initial: Solution | None = None
+    ) -> Solution: ...
 
 
-def create_solver(method: str, *, time_limit: int = 60) -> SolverFn:
+def with_fleet_growth(solver, *, max_attempts: int = FLEET_ATTEMPTS) -> SolverFn:
+    """
+    Wraps a solver so that it is rerun with a larger fleet (see
+    domain.fleet.grow_fleet) as long as it returns no solution or one that
+    leaves customers unserved or overloads a vehicle. Every attempt gets the
+    full time limit, the returned solution records the number of attempts in
+    fleet_attempts and its trace is shifted by the time of the earlier ones.
+    """
+
+    def solve(
+        instance: Instance, time_limit: int, *, initial: Solution | None = None
+    ) -> Solution:
+        num_vehicles = fleet_size(instance)
+        start = time.perf_counter()
+        for attempt in range(1, max_attempts + 1):
+            offset = time.perf_counter() - start
+            solution = solver(
+                instance, time_limit, num_vehicles=num_vehicles, initial=initial
+            )
+            if solution is not None:
+                report = check_solution(solution, instance)
+                if len(report.missing) == 0 and len(report.overloaded_routes) == 0:
+                    solution.fleet_attempts = attempt
+                    solution.trace = [
+                        (seconds + offset, cost) for seconds, cost in solution.trace
+                    ]
+                    return solution
+            larger = grow_fleet(num_vehicles, instance)
+            if larger == num_vehicles:
+                break
+            print(
+                f"No feasible solution for instance {instance.name} with {num_vehicles} vehicles, retrying with {larger}."
+            )
+            num_vehicles = larger
+        return solution
+
+    return solve
+
+
+def create_solver(
+    method: str,
+    *,
+    fleet_growth: bool = False,
+    warm_up: bool = True,
+    options: SolverOptions | None = None,
+    profiler: Profiler | None = None,
+    profile_dir: str | Path = "data/profiles",
+) -> SolverFn:
     """
     Factory function that returns a configured solver function.
 
     Args:
-        method: One of 'pyvrp', 'ortools', 'vroom', 'timefold', 'rustvrp', 'pyhygese'
-        time_limit: Maximum solve time in seconds
-
+        method: One of 'pyvrp', 'ortools', 'vroom', 'timefold', 'rustvrp', 'pyhygese', or one of the construction heuristics 'savings', 'sweep', 'nearest_neighbour'
+        fleet_growth: Whether to rerun the solver with a larger fleet if it finds no feasible solution
+        warm_up: Whether to pay one-off startup costs of the solver (e.g. compiling Timefold's solver factory) now instead of in the first solve
+        options: Threads, seed and solver-specific settings, see SolverOptions for how each solver uses them
+        profiler: None, "cprofile" or "py-spy" to profile every solve into profile_dir, see instrument.profiled
+        profile_dir: Directory the profiles are written to
 
     Returns:
-        A function that takes a Instance and returns a Solution
+        A function that takes a Instance (and optionally an initial Solution) and returns a Solution,
+        with the total wall-clock and CPU time and the peak memory of the call, see instrument.instrumented
     """
 
     solvers: dict[str, SolverFn] = {
@@ -34,10 +108,31 @@ def create_solver(method: str, *, time_limit: int = 60) -> SolverFn:
         "timefold": solve_with_timefold,
         "rustvrp": solve_with_rustvrp,
         "pyhygese": solve_with_pyhygese,
+        "savings": solve_with_savings,
+        "sweep": solve_with_sweep,
+        "nearest_neighbour": solve_with_nearest_neighbour,
+    }
+
+    warm_ups = {
+        "timefold": warm_up_timefold,
     }
 
     if method not in solvers:
         available = ", ".join(solvers.keys())
         raise ValueError(f"Unknown method '{method}'. Available: {available}")
 
-    return solvers[method]
+    if options is None:
+        options = SolverOptions()
+    if warm_up and method in warm_ups:
+        warm_ups[method](options)
+
+    solver = partial(solvers[method], options=options)
+    if fleet_growth:
+        solver = with_fleet_growth(solver)
+    return instrumented(
+        solver,
+        method=method,
+        options=options,
+        profiler=profiler,
+        profile_dir=profile_dir,
+    )
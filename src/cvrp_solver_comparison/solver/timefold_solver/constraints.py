@@ -5,7 +5,7 @@ from timefold.solver.score import (
     constraint_provider,
 )
 
-from .domain import DistanceMatrix, Visit
+from .domain import Visit
 
 VEHICLE_CAPACITY = "vehicleCapacity"
 MINIMIZE_TRAVEL_TIME = "minimizeTravelTime"
@@ -50,42 +50,20 @@ def vehicle_capacity(factory: ConstraintFactory):
 
 
 def minimize_travel_time(factory: ConstraintFactory):
-    # Penalize arc from depot to first visit
-    depot_to_first = (
+    # Penalize arc into every visit, from the depot or the previous visit
+    arc_into_visit = (
         factory.for_each(Visit)
-        .filter(
-            lambda visit: visit.vehicle is not None and visit.previous_visit is None
-        )
-        .join(DistanceMatrix)
-        .penalize(
-            HardSoftScore.ONE_SOFT,
-            lambda visit, dm: dm.matrix[visit.vehicle.home_location][visit.location],
-        )
-        .as_constraint("depotToFirstVisit")
-    )
-
-    # Penalize arcs between consecutive visits
-    visit_to_visit = (
-        factory.for_each(Visit)
-        .filter(lambda visit: visit.previous_visit is not None)
-        .join(DistanceMatrix)
-        .penalize(
-            HardSoftScore.ONE_SOFT,
-            lambda visit, dm: dm.matrix[visit.previous_visit.location][visit.location],
-        )
-        .as_constraint("visitToVisit")
+        .filter(lambda visit: visit.arc_distance is not None)
+        .penalize(HardSoftScore.ONE_SOFT, lambda visit: visit.arc_distance)
+        .as_constraint("arcIntoVisit")
     )
 
     # Penalize arc from last visit back to depot
     last_to_depot = (
         factory.for_each(Visit)
         .filter(lambda visit: visit.vehicle is not None and visit.next_visit is None)
-        .join(DistanceMatrix)
-        .penalize(
-            HardSoftScore.ONE_SOFT,
-            lambda visit, dm: dm.matrix[visit.location][visit.vehicle.home_location],
-        )
+        .penalize(HardSoftScore.ONE_SOFT, lambda visit: visit.distance_to_depot)
         .as_constraint("lastVisitToDepot")
     )
 
-    return [depot_to_first, visit_to_visit, last_to_depot]
+    return [arc_into_visit, last_to_depot]
@@ -5,6 +5,7 @@ from timefold.solver.domain import (
     planning_entity,
     PlanningId,
     planning_solution,
+    CascadingUpdateShadowVariable,
     InverseRelationShadowVariable,
     PreviousElementShadowVariable,
     NextElementShadowVariable,
@@ -45,6 +46,9 @@ class Visit:
     name: str
     location: int
     demand: int
+    distances: DistanceMatrix  # shared by all visits of a plan
+    distance_from_depot: int
+    distance_to_depot: int
     vehicle: Annotated[
         Optional["Vehicle"],
         InverseRelationShadowVariable(source_variable_name="visits"),
@@ -66,6 +70,23 @@ class Visit:
         VisitValidator,
         Field(default=None),
     ]
+    # distance of the arc into this visit, kept up to date on every move so
+    # that constraints read a number instead of joining the distance matrix
+    arc_distance: Annotated[
+        Optional[int],
+        CascadingUpdateShadowVariable(target_method_name="update_arc_distance"),
+        Field(default=None),
+    ]
+
+    def update_arc_distance(self):
+        if self.vehicle is None:
+            self.arc_distance = None
+        elif self.previous_visit is None:
+            self.arc_distance = self.distance_from_depot
+        else:
+            self.arc_distance = self.distances.matrix[self.previous_visit.location][
+                self.location
+            ]
 
     def __str__(self):
         return self.id
@@ -131,7 +152,9 @@ class VehicleRoutePlan:
     name: str
     vehicles: Annotated[list[Vehicle], PlanningEntityCollectionProperty]
     visits: Annotated[list[Visit], PlanningEntityCollectionProperty, ValueRangeProvider]
-    distance_matrix: Annotated[DistanceMatrix, ProblemFactProperty]
+    distance_matrix: Annotated[
+        Optional[DistanceMatrix], ProblemFactProperty
+    ]  # only needed by constraints that join it, e.g. in scripts/benchmark_timefold_constraints.py
     score: Annotated[
         Optional[HardSoftScore],
         PlanningScore,
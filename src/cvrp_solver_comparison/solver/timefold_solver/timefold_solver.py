@@ -1,8 +1,20 @@
+import dataclasses
+import itertools
+import time
+from concurrent.futures import Future
+from functools import cache
+
+from cvrp_solver_comparison.domain.fleet import initial_routes
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
+from cvrp_solver_comparison.solver.trace import improvements
 
-from timefold.solver import SolverFactory
+from timefold.solver import SolverManager
 from timefold.solver.config import (
+    MoveThreadCount,
     SolverConfig,
+    SolverConfigOverride,
     ScoreDirectorFactoryConfig,
     TerminationConfig,
     Duration,
@@ -19,31 +31,34 @@ from cvrp_solver_comparison.solver.timefold_solver.constraints import (
 )
 
 
-def solve_with_timefold(instance: Instance, time_limit: int) -> Solution:
-    # Simple timefold baseline would go here
-
-    solver_config = SolverConfig(
-        solution_class=VehicleRoutePlan,
-        entity_class_list=[Vehicle, Visit],
-        score_director_factory_config=ScoreDirectorFactoryConfig(
-            constraint_provider_function=define_constraints
-        ),
-        termination_config=TerminationConfig(spent_limit=Duration(seconds=time_limit)),
-    )
-    solver_factory = SolverFactory.create(solver_config)
-    solver = solver_factory.build_solver()
+def build_problem(
+    instance: Instance,
+    num_vehicles: int,
+    *,
+    with_distance_matrix: bool = False,
+    initial: Solution | None = None,
+) -> VehicleRoutePlan:
+    """
+    transform Instance to VehicleRoutePlan
 
-    # transform Instance to VehicleRoutePlan
-    problem = VehicleRoutePlan(
-        name="test",
+    All visits share one DistanceMatrix, which is only added as a problem
+    fact if with_distance_matrix is set. The routes
+    of an initial solution are pre-assigned to the first vehicles, the
+    construction heuristic then only inserts the visits they leave out.
+    """
+    matrix = instance.distances.rounded().tolist()
+    distances = DistanceMatrix(id="distance_matrix", matrix=matrix)
+    depot = int(instance.depot[0])
+    plan = VehicleRoutePlan(
+        name=instance.name,
         vehicles=[
             Vehicle(
                 f"vehicle_{i}",
                 capacity=instance.capacity,
-                home_location=int(instance.depot[0]),
+                home_location=depot,
                 visits=[],
             )
-            for i in range(1, len(instance.demand))
+            for i in range(1, num_vehicles + 1)
         ],
         visits=[
             Visit(
@@ -51,25 +66,239 @@ def solve_with_timefold(instance: Instance, time_limit: int) -> Solution:
                 name=f"visit_{i}",
                 location=i,
                 demand=int(instance.demand[i]),
+                distances=distances,
+                distance_from_depot=matrix[depot][i],
+                distance_to_depot=matrix[i][depot],
                 vehicle=None,
                 previous_visit=None,
                 next_visit=None,
+                arc_distance=None,
             )
             for i in range(1, len(instance.demand))
         ],
-        distance_matrix=DistanceMatrix(
-            id="distance_matrix",
-            matrix=[[round(entry) for entry in row] for row in instance.edge_weight],
-        ),
+        distance_matrix=distances if with_distance_matrix else None,
+        score=None,
+        solver_status=None,
+    )
+    for vehicle, route in zip(plan.vehicles, initial_routes(initial)):
+        # visit i is the customer at node i, see above
+        vehicle.visits = [plan.visits[stop - 1] for stop in route]
+        # Timefold does not run the cascading update of arc_distance for
+        # pre-assigned visits, so all shadow variables are set here
+        for position, visit in enumerate(vehicle.visits):
+            visit.vehicle = vehicle
+            if position > 0:
+                visit.previous_visit = vehicle.visits[position - 1]
+            if position + 1 < len(vehicle.visits):
+                visit.next_visit = vehicle.visits[position + 1]
+            visit.update_arc_distance()
+    return plan
+
+
+def _warm_up_problem() -> VehicleRoutePlan:
+    matrix = [[abs(i - j) for j in range(4)] for i in range(4)]
+    distances = DistanceMatrix(id="distance_matrix", matrix=matrix)
+    return VehicleRoutePlan(
+        name="warm_up",
+        vehicles=[Vehicle(f"vehicle_{i}", 2, 0, []) for i in range(2)],
+        visits=[
+            Visit(
+                i,
+                f"visit_{i}",
+                i,
+                1,
+                distances,
+                matrix[0][i],
+                matrix[i][0],
+                None,
+                None,
+                None,
+                None,
+            )
+            for i in range(1, 4)
+        ],
+        distance_matrix=None,
         score=None,
         solver_status=None,
     )
 
-    solution = solver.solve(problem=problem)
-    routes = [
-        [visit.id for visit in vehicle.visits]
-        for vehicle in solution.vehicles
-        if vehicle.visits
-    ]
-    score = -solution.score.soft_score
-    return Solution(routes=routes, cost=score)
+
+class TimefoldService:
+    """
+    Long-lived Timefold solver managers for a move thread count.
+
+    A tiny problem is solved when the service is created, so that the
+    translation of the domain and constraint streams to Java is done once
+    per process instead of in the first timed solve. Timefold 1.24 cannot
+    override the random seed of a config, so every seed gets its own
+    SolverManager, created from the same config on first use, which takes
+    a fraction of a second once the translation is done. Every solve gets
+    its own time limit through a SolverConfigOverride. More than one move
+    thread requires Timefold Enterprise.
+    """
+
+    def __init__(self, *, move_threads: int = 1):
+        tic = time.perf_counter()
+        self.solver_config = SolverConfig(
+            move_thread_count=(
+                MoveThreadCount.NONE if move_threads == 1 else move_threads
+            ),
+            solution_class=VehicleRoutePlan,
+            entity_class_list=[Vehicle, Visit],
+            score_director_factory_config=ScoreDirectorFactoryConfig(
+                constraint_provider_function=define_constraints
+            ),
+            termination_config=TerminationConfig(spent_limit=Duration(seconds=1)),
+        )
+        self._managers: dict[int, SolverManager] = {}
+        self._problem_ids = itertools.count()
+        self.solve(_warm_up_problem(), Duration(milliseconds=100))
+        self.startup_time = time.perf_counter() - tic
+        self.num_solves = 0  # not counting the warm-up
+
+    def manager(self, random_seed: int = 0) -> SolverManager:
+        """The SolverManager for a random seed, created on first use."""
+        if random_seed not in self._managers:
+            self._managers[random_seed] = SolverManager.create(
+                dataclasses.replace(self.solver_config, random_seed=random_seed)
+            )
+        return self._managers[random_seed]
+
+    def solve(
+        self,
+        problem: VehicleRoutePlan,
+        spent_limit: Duration,
+        trace: list[tuple[float, int]] | None = None,
+        *,
+        random_seed: int = 0,
+    ) -> VehicleRoutePlan:
+        """
+        Solves problem, appending (seconds spent, cost) of every new feasible
+        best solution to trace.
+
+        The consumers of the SolverManager get the solutions on a consumer
+        thread, converted back to Python, and may skip some while the solver
+        is busy, so a point is timed when its solution arrives, which can be
+        well after the solver found it. The final best solution is recorded
+        as well, so the trace always ends with the returned cost.
+        """
+        tic = time.perf_counter()
+        final = Future()
+
+        def record(solution: VehicleRoutePlan) -> None:
+            # the construction heuristic publishes partial solutions too
+            assigned = sum(len(vehicle.visits) for vehicle in solution.vehicles)
+            if (
+                trace is not None
+                and assigned == len(solution.visits)
+                and solution.score.hard_score == 0
+            ):
+                trace.append((time.perf_counter() - tic, -solution.score.soft_score))
+
+        def finish(solution: VehicleRoutePlan) -> None:
+            record(solution)
+            final.set_result(solution)
+
+        (
+            self.manager(random_seed)
+            .solve_builder()
+            .with_problem_id(next(self._problem_ids))
+            .with_problem(problem)
+            .with_config_override(
+                SolverConfigOverride(
+                    termination_config=TerminationConfig(spent_limit=spent_limit)
+                )
+            )
+            .with_best_solution_consumer(record)
+            .with_final_best_solution_consumer(finish)
+            .with_exception_handler(lambda _, error: final.set_exception(error))
+            .run()
+        )
+        return final.result()
+
+
+@cache
+def get_service(*, move_threads: int = 1) -> TimefoldService:
+    """The TimefoldService of this process for a thread count, created and warmed up on first use."""
+    return TimefoldService(move_threads=move_threads)
+
+
+def _service(options: SolverOptions) -> TimefoldService:
+    return get_service(move_threads=options.num_threads())
+
+
+def warm_up(options: SolverOptions = SolverOptions()) -> float:
+    """Creates the service of this process and its manager for options.seed, if needed, and returns the startup time of the service in seconds."""
+    service = _service(options)
+    service.manager(options.seed)
+    return service.startup_time
+
+
+class TimefoldAdapter(SolverAdapter):
+    """
+    Solves the instance with the TimefoldService of this process.
+
+    The prepared model is the VehicleRoutePlan, which Timefold copies
+    instead of changing it. With an initial solution, whose routes are
+    pre-assigned to the vehicles, a plan is built for the call instead.
+    The startup time of the service is reported in timings["startup"] of
+    the first solve of the process and is never part of timings["solve"].
+    options.seed is the random seed and options.threads the move thread
+    count of the solver.
+    """
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> VehicleRoutePlan:
+        return build_problem(instance, num_vehicles)
+
+    def solve(
+        self,
+        prepared: VehicleRoutePlan,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        service = _service(options)
+        startup_time = service.startup_time if service.num_solves == 0 else 0.0
+        service.num_solves += 1
+
+        tic = time.perf_counter()
+        if initial is not None:
+            prepared = build_problem(instance, num_vehicles, initial=initial)
+        build_time = time.perf_counter() - tic
+
+        tic = time.perf_counter()
+        trace = []
+        solution = service.solve(
+            prepared, Duration(seconds=time_limit), trace, random_seed=options.seed
+        )
+        solve_time = time.perf_counter() - tic
+        if solution.score.hard_score < 0:
+            return None
+
+        tic = time.perf_counter()
+        routes = [
+            [visit.id for visit in vehicle.visits]
+            for vehicle in solution.vehicles
+            if vehicle.visits
+        ]
+        score = -solution.score.soft_score
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            routes=routes,
+            cost=score,
+            timings={
+                "startup": startup_time,
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=improvements(trace),
+        )
+
+
+solve_with_timefold = TimefoldAdapter()
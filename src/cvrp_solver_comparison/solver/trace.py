@@ -0,0 +1,46 @@
+import ctypes
+import math
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, Iterator
+
+
+def improvements(points: Iterable[tuple[float, float]]) -> list[tuple[float, int]]:
+    """The (time, cost) points in which the cost drops below all earlier ones, costs as ints."""
+    trace = []
+    for time, cost in points:
+        if not math.isfinite(cost):
+            continue
+        if not trace or round(cost) < trace[-1][1]:
+            trace.append((float(time), int(round(cost))))
+    return trace
+
+
+@contextmanager
+def capture_stdout() -> Iterator[list[str]]:
+    """
+    Captures everything written to file descriptor 1 inside the block, also
+    by native code such as the C++ solvers behind pyhygese, and writes it to
+    the original stdout afterwards. The captured text is appended to the
+    yielded list when the block exits.
+    """
+    libc = ctypes.CDLL(None)
+    sys.stdout.flush()
+    saved = os.dup(1)
+    with tempfile.TemporaryFile(mode="w+b") as capture:
+        os.dup2(capture.fileno(), 1)
+        output = []
+        try:
+            yield output
+        finally:
+            libc.fflush(None)  # C stdio buffers fully when writing to a file
+            sys.stdout.flush()
+            os.dup2(saved, 1)
+            os.close(saved)
+            capture.seek(0)
+            text = capture.read().decode(errors="replace")
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            output.append(text)
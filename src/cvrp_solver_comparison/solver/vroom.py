@@ -1,37 +1,134 @@
+import time
+
+import numpy as np
 import vroom
 
+from cvrp_solver_comparison.domain.fleet import initial_routes
 from cvrp_solver_comparison.domain.models import Instance, Solution
+from cvrp_solver_comparison.domain.routes import RouteArray
+from cvrp_solver_comparison.solver.adapter import SolverAdapter
+from cvrp_solver_comparison.solver.options import SolverOptions
 
 
-def solve_with_vroom(instance: Instance, time_limit: int) -> Solution:
+def extract_routes(solution: vroom.solution.solution.Solution) -> RouteArray:
     """
-    Code for solving the CVRP using vroom. Code heavily inspired by this documentation of the tool:
-    https://github.com/VROOM-Project/pyvroom
+    Routes of a vroom solution, without building its pandas frame.
+
+    The steps of all vehicles come as one structured array in which the steps
+    of a vehicle are contiguous, so the job locations already are the stops
+    of a RouteArray, with a new route wherever the vehicle_id changes. The
+    array comes from a private method of pyvroom, versions without it fall
+    back to the same columns of the public solution.routes frame.
+    """
+    if hasattr(solution, "_routes_numpy"):
+        steps = np.asarray(solution._routes_numpy())
+    else:
+        steps = solution.routes[["vehicle_id", "location_index"]]
+    jobs = steps[steps["location_index"] != 0]
+    return RouteArray.from_route_ids(
+        np.asarray(jobs["location_index"]), np.asarray(jobs["vehicle_id"])
+    )
+
+
+def _steps(route: list[int]) -> list[vroom.VehicleStep]:
+    return (
+        [vroom.VehicleStep("start")]
+        + [vroom.VehicleStep("single", stop) for stop in route]
+        + [vroom.VehicleStep("end")]
+    )
+
+
+def build_input(
+    instance: Instance, num_vehicles: int, routes: list[list[int]] = ()
+) -> vroom.Input:
+    """
+    vroom Input of an instance, the routes are given to the first vehicles
+    as steps, which vroom uses as its starting solution.
     """
     problem_instance = vroom.Input()
     problem_instance.set_durations_matrix(
-        profile="car", matrix_input=instance.edge_weight.round()
+        profile="car", matrix_input=instance.distances.rounded()
     )
+    # all vehicles and jobs are handed over in one call each, built from plain
+    # python ints instead of numpy scalars
+    capacity = [int(instance.capacity)]
     problem_instance.add_vehicle(
         [
-            vroom.Vehicle(id=i, capacity=[instance.capacity], start=0, end=0)
-            for i, _ in enumerate(instance.demand)
+            vroom.Vehicle(
+                id=i,
+                capacity=capacity,
+                start=0,
+                end=0,
+                steps=_steps(routes[i]) if i < len(routes) else (),
+            )
+            for i in range(num_vehicles)
         ]
     )
+    demand = np.asarray(instance.demand).tolist()
     problem_instance.add_job(
         [
-            vroom.Job(id=i, location=i, delivery=[instance.demand[i]])
-            for i in range(1, len(instance.demand))
+            vroom.Job(id=i, location=i, delivery=[demand[i]])
+            for i in range(1, len(demand))
         ]
     )
-    solution = problem_instance.solve(exploration_level=5, nb_threads=1)
-
-    routes = {}
-    for _, row in solution.routes.iterrows():
-        vehicle = row["vehicle_id"]
-        if vehicle not in routes:
-            routes[vehicle] = []
-        if row["location_index"] != 0:
-            routes[vehicle].append(row["location_index"])
-    cost = solution.summary.cost
-    return Solution(cost=cost, routes=list(routes.values()))
+    return problem_instance
+
+
+class VroomAdapter(SolverAdapter):
+    """
+    Code for solving the CVRP using vroom. Code heavily inspired by this documentation of the tool:
+    https://github.com/VROOM-Project/pyvroom
+
+    options.threads is passed on as nb_threads and
+    options.vroom_exploration_level as exploration_level.
+    The prepared model is the vroom Input, which can be solved any number
+    of times. With an initial solution, whose routes become the steps of
+    the vehicles, an Input is built for the call instead.
+    """
+
+    def prepare(
+        self, instance: Instance, num_vehicles: int, options: SolverOptions
+    ) -> vroom.Input:
+        return build_input(instance, num_vehicles)
+
+    def solve(
+        self,
+        prepared: vroom.Input,
+        instance: Instance,
+        time_limit: int,
+        *,
+        num_vehicles: int,
+        initial: Solution | None,
+        options: SolverOptions,
+    ) -> Solution | None:
+        tic = time.perf_counter()
+        if initial is not None:
+            prepared = build_input(instance, num_vehicles, initial_routes(initial))
+        build_time = time.perf_counter() - tic
+
+        tic = time.perf_counter()
+        solution = prepared.solve(
+            exploration_level=options.vroom_exploration_level,
+            nb_threads=options.num_threads(),
+        )
+        solve_time = time.perf_counter() - tic
+        if solution.summary.unassigned > 0:
+            return None
+
+        tic = time.perf_counter()
+        routes = extract_routes(solution)
+        cost = solution.summary.cost
+        extract_time = time.perf_counter() - tic
+        return Solution(
+            cost=cost,
+            routes=routes,
+            timings={
+                "build": build_time,
+                "solve": solve_time,
+                "extract": extract_time,
+            },
+            trace=[(solve_time, int(cost))],  # vroom reports no intermediate solutions
+        )
+
+
+solve_with_vroom = VroomAdapter()